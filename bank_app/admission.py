@@ -0,0 +1,205 @@
+import importlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, request, jsonify, g
+
+FULL = 'full'
+DEGRADED = 'degraded'
+
+class MemoryRateLimitBackend:
+    """
+    in-process token buckets, one per client key
+
+    buckets are kept in least recently used order; past max_keys the
+    stalest one is evicted in O(1), so memory stays bounded.
+    Another backend (e.g. Redis for limits shared between workers) only
+    needs the same take() method
+    """
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, cost=1):
+        """
+        (allowed, retry_after_seconds) for spending cost tokens from key's bucket
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - last) * rate)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                allowed, retry_after = True, 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                allowed, retry_after = False, (cost - tokens) / rate
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+class AdaptiveConcurrencyLimiter:
+    """
+    concurrency limit that follows observed inference latency
+
+    the limit grows while latency stays near the best latency seen and
+    shrinks in proportion when requests start queueing (gradient
+    algorithm). Requests over the limit but within degrade_queue of it are
+    admitted in degraded mode; beyond that they are rejected.
+    """
+    def __init__(self, initial=16, minimum=2, maximum=128, degrade_queue=16, tolerance=2.0, smoothing=0.2):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.degrade_queue = degrade_queue
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.in_flight = 0
+        self.best_latency = None
+        self.latency = None
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        FULL, DEGRADED or None when the request should be shed
+        """
+        with self._lock:
+            limit = int(self.limit)
+            if self.in_flight < limit:
+                mode = FULL
+            elif self.in_flight < limit + self.degrade_queue:
+                mode = DEGRADED
+            else:
+                return None
+            self.in_flight += 1
+            return mode
+
+    def release(self, latency=None, cost=1):
+        """
+        end a request; latency is divided by its cost (applications scored)
+        so large batches do not read as congestion
+        """
+        with self._lock:
+            self.in_flight -= 1
+            if latency is not None:
+                self._update(latency / max(cost, 1))
+
+    def _update(self, latency):
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.smoothing * (latency - self.latency)
+        if self.best_latency is None or latency < self.best_latency:
+            self.best_latency = latency
+        else:
+            self.best_latency += 0.001 * (self.latency - self.best_latency)
+
+        gradient = max(0.5, min(1.0, self.tolerance * self.best_latency / self.latency))
+        new_limit = self.limit * gradient + math.sqrt(self.limit)
+        self.limit = max(self.minimum, min(self.maximum, new_limit))
+
+    def status(self):
+        return {
+            'limit': int(self.limit),
+            'in_flight': self.in_flight,
+            'latency_ms': None if self.latency is None else round(self.latency * 1000, 3),
+            'best_latency_ms': None if self.best_latency is None else round(self.best_latency * 1000, 3)
+        }
+
+def _load_backend(backend):
+    if isinstance(backend, str):
+        module_name, _, class_name = backend.rpartition('.')
+        backend = getattr(importlib.import_module(module_name), class_name)
+    return backend() if isinstance(backend, type) else backend
+
+def _load_key(key):
+    if isinstance(key, str):
+        module_name, _, function_name = key.rpartition('.')
+        key = getattr(importlib.import_module(module_name), function_name)
+    return key or client_key
+
+def client_key(req):
+    """
+    rate limit key of a request, its remote address
+
+    client-set headers such as X-Client-Id are not trusted, since a client
+    could send a fresh one per request; behind a proxy, set
+    LOAN_RATE_LIMIT_KEY to a function reading the address the proxy vouches for
+    """
+    return req.remote_addr or 'anonymous'
+
+def mark_scored():
+    """
+    record that the current request reached model inference
+    """
+    g.admission_scored = True
+
+def admission_controlled(cost=None):
+    """
+    rate limit, concurrency limit and degrade the decorated scoring view
+
+    cost(request) gives the number of tokens a request spends; a request
+    costing more than the burst can never be admitted and gets a 413. The
+    view reads g.admission_mode to decide whether to run in degraded mode
+    and calls mark_scored() once it reaches the models; only those requests
+    feed their latency, per unit of cost, to the concurrency limiter, so
+    fast validation failures and errors cannot drag its baseline down.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            admission = current_app.extensions.get('admission')
+            if admission is None:
+                g.admission_mode = FULL
+                return view(*args, **kwargs)
+
+            config = current_app.config
+            spend = cost(request) if cost else 1
+            rate = config.get('LOAN_RATE_LIMIT', 50)
+            if rate:
+                burst = config.get('LOAN_RATE_BURST', 1000)
+                if spend > burst:
+                    return jsonify({'error': f'At most {burst:g} applications per request under the rate limit'}), 413
+                allowed, retry_after = admission['backend'].take(admission['key'](request), rate, burst, spend)
+                if not allowed:
+                    response = jsonify({'error': 'Rate limit exceeded'})
+                    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+                    return response, 429
+
+            limiter = admission['limiter']
+            mode = limiter.acquire()
+            if mode is None:
+                response = jsonify({'error': 'Server is overloaded, please retry'})
+                response.headers['Retry-After'] = '1'
+                return response, 503
+
+            g.admission_mode = mode
+            g.admission_scored = False
+            started = time.perf_counter()
+            try:
+                return view(*args, **kwargs)
+            finally:
+                scored = mode == FULL and g.admission_scored
+                limiter.release(time.perf_counter() - started if scored else None, spend)
+        return wrapper
+    return decorator
+
+def init_app(app):
+    """
+    attach the rate limit backend and concurrency limiter for the loan API
+    """
+    if not app.config.get('LOAN_ADMISSION_ENABLED', True):
+        return
+    app.extensions['admission'] = {
+        'backend': _load_backend(app.config.get('LOAN_RATE_LIMIT_BACKEND', MemoryRateLimitBackend)),
+        'key': _load_key(app.config.get('LOAN_RATE_LIMIT_KEY')),
+        'limiter': AdaptiveConcurrencyLimiter(
+            initial=app.config.get('LOAN_CONCURRENCY_LIMIT', 16),
+            minimum=app.config.get('LOAN_CONCURRENCY_MIN', 2),
+            maximum=app.config.get('LOAN_CONCURRENCY_MAX', 128),
+            degrade_queue=app.config.get('LOAN_DEGRADE_QUEUE', 16)
+        )
+    }
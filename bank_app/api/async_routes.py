@@ -0,0 +1,164 @@
+import json
+import re
+from sqlalchemy import select
+from bank_app.db.models import Bank, version_bump
+from bank_app.db.async_db import create_engine, create_sessionmaker, create_tables
+
+BANK_PATH = re.compile(r'^/api/banks/(\d+)/?$')
+
+class AsyncBankAPI:
+    """
+    ASGI application serving the /api/banks endpoints on an async engine
+
+    requests for any other path are handed to fallback, usually the Flask
+    app wrapped for ASGI, so one process serves the whole site
+    """
+    def __init__(self, database_url=None, fallback=None, on_change=None, pool_size=10, max_overflow=20):
+        self.engine = create_engine(database_url, pool_size=pool_size, max_overflow=max_overflow)
+        self.sessions = create_sessionmaker(self.engine)
+        self.fallback = fallback
+        self.on_change = on_change
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+
+        if scope['type'] == 'http':
+            handler, args = self._route(scope['method'], scope['path'])
+            if handler is not None:
+                body = await _read_body(receive)
+                status, payload = await handler(body, *args)
+                return await _send_json(send, status, payload)
+
+        if self.fallback is not None:
+            return await self.fallback(scope, receive, send)
+        await _send_json(send, 404, {'error': 'Not found'})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await create_tables(self.engine)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _route(self, method, path):
+        if path.rstrip('/') == '/api/banks':
+            if method == 'GET':
+                return self.list_banks, ()
+            if method == 'POST':
+                return self.create_bank, ()
+        match = BANK_PATH.match(path)
+        if match:
+            bank_id = int(match.group(1))
+            handler = {'GET': self.get_bank, 'PUT': self.update_bank, 'DELETE': self.delete_bank}.get(method)
+            if handler is not None:
+                return handler, (bank_id,)
+        return None, ()
+
+    def _changed(self, bank_id):
+        if self.on_change is not None:
+            self.on_change(bank_id)
+
+    async def list_banks(self, body):
+        """
+        get list of all banks, JSON
+        """
+        async with self.sessions() as session:
+            banks = (await session.scalars(select(Bank).order_by(Bank.id))).all()
+        return 200, [bank.to_dict() for bank in banks]
+
+    async def get_bank(self, body, bank_id):
+        """
+        get a specific bank, JSON
+        """
+        async with self.sessions() as session:
+            bank = await session.get(Bank, bank_id)
+        if bank is None:
+            return 404, {'error': 'Bank not found'}
+        return 200, bank.to_dict()
+
+    async def create_bank(self, body):
+        """
+        to create a new bank, JSON
+        """
+        data = _parse_json(body)
+        if not data or not data.get('name') or not data.get('location'):
+            return 400, {'error': 'Name and location are required!'}
+
+        async with self.sessions.begin() as session:
+            bank = Bank(name=data['name'], location=data['location'])
+            session.add(bank)
+            await session.flush()
+            await _record_change(session, bank.id)
+            result = bank.to_dict()
+        self._changed(result['id'])
+        return 201, result
+
+    async def update_bank(self, body, bank_id):
+        """
+        endpoint to update a bank, JSON
+        """
+        data = _parse_json(body)
+        async with self.sessions.begin() as session:
+            bank = await session.get(Bank, bank_id)
+            if bank is None:
+                return 404, {'error': 'Bank not found'}
+            if not data:
+                return 400, {'error': 'No data provided!'}
+            if 'name' in data:
+                bank.name = data['name']
+            if 'location' in data:
+                bank.location = data['location']
+            await session.flush()
+            await _record_change(session, bank_id)
+            result = bank.to_dict()
+        self._changed(bank_id)
+        return 200, result
+
+    async def delete_bank(self, body, bank_id):
+        """
+        to delete a bank, JSON
+        """
+        async with self.sessions.begin() as session:
+            bank = await session.get(Bank, bank_id)
+            if bank is None:
+                return 404, {'error': 'Bank not found'}
+            await session.delete(bank)
+            await session.flush()
+            await _record_change(session, bank_id, deleted=True)
+        self._changed(bank_id)
+        return 200, {'message': 'Bank deleted successfully!'}
+
+async def _record_change(session, bank_id, deleted=False):
+    for statement in version_bump(bank_id, deleted):
+        await session.execute(statement)
+
+def _parse_json(body):
+    if not body:
+        return None
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+async def _send_json(send, status, payload):
+    body = json.dumps(payload).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+    })
+    await send({'type': 'http.response.body', 'body': body})
@@ -1,144 +1,234 @@
-from flask import Blueprint, request, jsonify, render_template, flash, redirect, url_for
-import pickle
+from flask import Blueprint, request, jsonify, render_template, flash, redirect, url_for, current_app, g
 import numpy as np
 import os
 import sys
+import time
+from bank_app.admission import admission_controlled, mark_scored, DEGRADED
+from bank_app.audit import record_prediction
 
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'loan_prediction'))
 
+from ensemble import BundleRouter, label
+from explain import BundleExplainer
+from schema import LOAN_APPLICATION, ValidationError
+
 loan_bp = Blueprint('loan', __name__, url_prefix='/loan')
 
+MAX_BATCH_SIZE = 1000
+
+DEGRADED_MEMBERS = ('dt',)
+
 model_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'loan_prediction/models')
 
-def load_models():
-    """Load the preprocessor and models for prediction"""
+def get_router():
+    """
+    the model bundle router for this app, created on first use
+    """
+    router = current_app.extensions.get('loan_router')
+    if router is None:
+        store_dir = current_app.config.get('LOAN_MODEL_STORE')
+        if store_dir:
+            from model_store import attach_store
+            router = BundleRouter(store_dir, current_app.config.get('LOAN_MODEL_ROUTES'), loader=attach_store)
+        else:
+            router = BundleRouter(
+                current_app.config.get('LOAN_MODEL_DIR', model_dir),
+                current_app.config.get('LOAN_MODEL_ROUTES')
+            )
+        current_app.extensions['loan_router'] = router
+    return router
+
+def routing_key():
+    """
+    key used to keep a client on the same model version
+
+    without an X-Client-Id the version is picked at random; the remote
+    address is not used since behind a proxy every request shares it
+    """
+    return request.headers.get('X-Client-Id') or None
+
+def load_models(version=None):
+    """Load the model bundle a request should be scored with"""
+    router = get_router()
     try:
-        with open(os.path.join(model_dir, 'preprocessor.pkl'), 'rb') as f:
-            preprocessor = pickle.load(f)
-        
-        with open(os.path.join(model_dir, 'knn_model.pkl'), 'rb') as f:
-            knn_model = pickle.load(f)
-            
-        with open(os.path.join(model_dir, 'decision_tree_model.pkl'), 'rb') as f:
-            dt_model = pickle.load(f)
-            
-        return preprocessor, knn_model, dt_model
+        if version is None:
+            return router.route(routing_key())
+        return router.get(version)
     except FileNotFoundError:
-        return None, None, None
+        return None
+
+def get_explainer(bundle):
+    """
+    the cached explainer for a bundle, so per-leaf contributions are built once
+    """
+    explainers = current_app.extensions.setdefault('loan_explainers', {})
+    explainer = explainers.get(bundle.version)
+    if explainer is None or explainer.bundle is not bundle:
+        explainer = BundleExplainer(bundle)
+        explainers[bundle.version] = explainer
+    return explainer
+
+def vote_label(votes, name):
+    vote = votes.get(name)
+    if vote is None:
+        return "Skipped"
+    return label(vote['prediction'])
+
+def describe_agreement(result):
+    """
+    how the ensemble reached its decision, for display
+    """
+    if result['short_circuited']:
+        return "Confident early model, remaining models skipped"
+    predictions = {vote['prediction'] for vote in result['votes'].values() if vote is not None}
+    if len(predictions) == 1:
+        return "All models agree"
+    return "Models disagree, using weighted vote"
 
 @loan_bp.route('/')
 def index():
     """Loan prediction form page"""
     return render_template('loan_form.html')
 
+def parse_applications(data):
+    """
+    validate a JSON body holding one application or a list of them
+    """
+    limit = current_app.config.get('LOAN_MAX_BATCH_SIZE', MAX_BATCH_SIZE)
+    if isinstance(data, list) and len(data) > limit:
+        raise ValidationError([{'index': None, 'field': None,
+                                'error': f'At most {limit} applications per request'}])
+    return LOAN_APPLICATION.validate_batch(data)
+
+def validation_response(error):
+    return jsonify({'error': str(error), 'errors': error.errors}), 400
+
 @loan_bp.route('/predict', methods=['POST'])
 def predict():
     """Process loan prediction from form"""
     if request.method == 'POST':
+        started = time.perf_counter()
         try:
-            income = float(request.form.get('income'))
-            credit_score = float(request.form.get('credit_score'))
-            loan_amount = float(request.form.get('loan_amount'))
-            loan_term = float(request.form.get('loan_term'))
-            employment_status = request.form.get('employment_status')
+            input_df = LOAN_APPLICATION.validate(request.form.to_dict())
             
-            preprocessor, knn_model, dt_model = load_models()
+            bundle = load_models()
             
-            if None in (preprocessor, knn_model, dt_model):
+            if bundle is None:
                 flash('Models not found. Please train the models first.', 'error')
                 return redirect(url_for('loan.index'))
             
-            data = {
-                'income': [income],
-                'credit_score': [credit_score],
-                'loan_amount': [loan_amount],
-                'loan_term': [loan_term],
-                'employment_status': [employment_status]
-            }
-            
-            import pandas as pd
-            input_df = pd.DataFrame(data)
-            
-            X_processed = preprocessor.transform(input_df)
-            
-            knn_pred = knn_model.predict(X_processed)[0]
-            dt_pred = dt_model.predict(X_processed)[0]
-            
-            knn_prob = knn_model.predict_proba(X_processed)[0][1]
-            dt_prob = dt_model.predict_proba(X_processed)[0][1]
+            data = input_df.to_dict(orient='list')
             
-            avg_prob = (knn_prob + dt_prob) / 2
-            
-            if knn_pred == dt_pred:
-                final_pred = "Approved" if knn_pred == 1 else "Rejected"
-                agreement = "Both models agree"
-            else:
-                final_pred = "Approved" if avg_prob > 0.5 else "Rejected"
-                agreement = "Models disagree, using average probability"
+            results = bundle.predict(input_df)
+            record_prediction('/loan/predict', input_df, results, bundle.version, started)
+            scored = results[0]
             
             result = {
-                'prediction': final_pred,
-                'knn_prediction': "Approved" if knn_pred == 1 else "Rejected",
-                'dt_prediction': "Approved" if dt_pred == 1 else "Rejected",
-                'probability': f"{avg_prob:.2f}",
-                'agreement': agreement
+                'prediction': label(scored['prediction']),
+                'knn_prediction': vote_label(scored['votes'], 'knn'),
+                'dt_prediction': vote_label(scored['votes'], 'dt'),
+                'probability': f"{scored['probability']:.2f}",
+                'agreement': describe_agreement(scored),
+                'model_version': bundle.version
             }
             
             return render_template('loan_result.html', result=result, loan_data=data)
             
-        except ValueError:
-            flash('Please enter valid numeric values for income, credit score, loan amount, and loan term.', 'error')
+        except ValidationError as e:
+            for error in e.errors:
+                flash(error['error'], 'error')
             return redirect(url_for('loan.index'))
-        except Exception as e:
-            flash(f'An error occurred: {str(e)}', 'error')
+        except Exception:
+            current_app.logger.exception('Loan prediction failed')
+            flash('An error occurred while scoring the application.', 'error')
             return redirect(url_for('loan.index'))
 
+def application_count(req):
+    """
+    rate limit cost of a request, one token per application
+    """
+    data = req.get_json(silent=True)
+    return len(data) if isinstance(data, list) and data else 1
+
+def prediction_payload(result, bundle, degraded=False):
+    payload = {
+        'prediction': label(result['prediction']),
+        'knn_prediction': vote_label(result['votes'], 'knn'),
+        'dt_prediction': vote_label(result['votes'], 'dt'),
+        'probability': round(result['probability'], 2),
+        'model_version': bundle.version,
+        'votes': result['votes']
+    }
+    if degraded:
+        payload['degraded'] = True
+    return payload
+
 @loan_bp.route('/api/predict', methods=['POST'])
+@admission_controlled(cost=application_count)
 def predict_api():
-    """API endpoint for loan prediction"""
+    """API endpoint for loan prediction, one application or a list"""
+    started = time.perf_counter()
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        input_df = parse_applications(data)
         
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
-            
-        required_fields = ['income', 'credit_score', 'loan_amount', 'loan_term', 'employment_status']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
+        bundle = load_models()
         
-        preprocessor, knn_model, dt_model = load_models()
-        
-        if None in (preprocessor, knn_model, dt_model):
+        if bundle is None:
             return jsonify({'error': 'Models not found. Please train the models first.'}), 500
         
-        import pandas as pd
-        input_df = pd.DataFrame({
-            'income': [float(data['income'])],
-            'credit_score': [float(data['credit_score'])],
-            'loan_amount': [float(data['loan_amount'])],
-            'loan_term': [float(data['loan_term'])],
-            'employment_status': [data['employment_status']]
-        })
+        degraded = g.admission_mode == DEGRADED
+        if degraded:
+            only = current_app.config.get('LOAN_DEGRADED_MEMBERS', DEGRADED_MEMBERS)
+            results = bundle.predict(input_df, only=only)
+        else:
+            results = bundle.predict(input_df)
+        mark_scored()
+        record_prediction('/loan/api/predict', input_df, results, bundle.version, started, degraded)
+        predictions = [prediction_payload(result, bundle, degraded) for result in results]
         
-        X_processed = preprocessor.transform(input_df)
+        return jsonify(predictions if isinstance(data, list) else predictions[0])
         
-        knn_pred = knn_model.predict(X_processed)[0]
-        dt_pred = dt_model.predict(X_processed)[0]
+    except ValidationError as e:
+        return validation_response(e)
+    except Exception:
+        current_app.logger.exception('Loan prediction failed')
+        return jsonify({'error': 'Prediction failed'}), 500
+
+@loan_bp.route('/api/explain', methods=['POST'])
+@admission_controlled(cost=application_count)
+def explain_api():
+    """API endpoint explaining loan predictions, one application or a list"""
+    try:
+        data = request.get_json(silent=True)
+        input_df = parse_applications(data)
         
-        knn_prob = knn_model.predict_proba(X_processed)[0][1]
-        dt_prob = dt_model.predict_proba(X_processed)[0][1]
+        bundle = load_models()
         
-        avg_prob = (knn_prob + dt_prob) / 2
+        if bundle is None:
+            return jsonify({'error': 'Models not found. Please train the models first.'}), 500
+        
+        if g.admission_mode == DEGRADED:
+            response = jsonify({'error': 'Server is busy, explanations are paused, please retry'})
+            response.headers['Retry-After'] = '1'
+            return response, 503
+        
+        explanations = get_explainer(bundle).explain(input_df)
+        mark_scored()
+        explained = [
+            {
+                'prediction': label(result['prediction']),
+                'probability': round(result['probability'], 2),
+                'model_version': bundle.version,
+                'explanations': result['explanations']
+            }
+            for result in explanations
+        ]
         
-        return jsonify({
-            'prediction': "Approved" if (knn_pred + dt_pred) / 2 > 0.5 else "Rejected",
-            'knn_prediction': "Approved" if knn_pred == 1 else "Rejected",
-            'dt_prediction': "Approved" if dt_pred == 1 else "Rejected",
-            'probability': round(avg_prob, 2)
-        })
+        return jsonify(explained if isinstance(data, list) else explained[0])
         
-    except ValueError:
-        return jsonify({'error': 'Invalid numeric values provided'}), 400
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500 
\ No newline at end of file
+    except ValidationError as e:
+        return validation_response(e)
+    except Exception:
+        current_app.logger.exception('Loan explanation failed')
+        return jsonify({'error': 'Explanation failed'}), 500
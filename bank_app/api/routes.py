@@ -1,5 +1,8 @@
-from flask import Blueprint, request, jsonify, render_template, redirect, url_for, flash
-from bank_app.db.models import db, Bank
+from flask import Blueprint, request, jsonify, render_template, redirect, url_for, flash, abort
+from markupsafe import Markup
+from bank_app.db.models import Bank
+from bank_app.db.writer import run_write, create_bank_record, update_bank_record, delete_bank_record
+from bank_app.cache import get_cache, get_fragment_template, render_fragment, detail_key, list_key, bank_versions
 
 bank_bp = Blueprint('bank', __name__)
 
@@ -8,16 +11,29 @@ def index():
     """
     route for the home page displaying a list of all banks
     """
-    banks = Bank.query.all()
-    return render_template('index.html', banks=banks)
+    cache = get_cache()
+    key = list_key()
+    cards = cache.get(key)
+    if cards is None:
+        versions = bank_versions()
+        banks = Bank.query.all()
+        cards = Markup('').join(render_fragment('card', bank, versions.get(bank.id, 0)) for bank in banks)
+        cache.set(key, cards)
+    return render_template('index.html', cards=cards)
 
 @bank_bp.route('/bank/<int:bank_id>')
 def get_bank(bank_id):
     """
     Route to display details for a specific bank
     """
-    bank = Bank.query.get_or_404(bank_id)
-    return render_template('bank_details.html', bank=bank)
+    cache = get_cache()
+    key = detail_key(bank_id)
+    detail = cache.get(key)
+    if detail is None:
+        bank = Bank.query.get_or_404(bank_id)
+        detail = Markup(render_template(get_fragment_template('detail'), bank=bank))
+        cache.set(key, detail)
+    return render_template('bank_details.html', detail=detail)
 
 @bank_bp.route('/bank/new', methods=['GET', 'POST'])
 def create_bank():
@@ -32,9 +48,7 @@ def create_bank():
             flash('Name and location are required!', 'error')
             return redirect(url_for('bank.create_bank'))
         
-        new_bank = Bank(name=name, location=location)
-        db.session.add(new_bank)
-        db.session.commit()
+        run_write(create_bank_record, name, location)
         
         flash('Bank added successfully!', 'success')
         return redirect(url_for('bank.index'))
@@ -46,8 +60,6 @@ def update_bank(bank_id):
     """
     Route to update an existing bank
     """
-    bank = Bank.query.get_or_404(bank_id)
-    
     if request.method == 'POST':
         name = request.form.get('name')
         location = request.form.get('location')
@@ -56,13 +68,13 @@ def update_bank(bank_id):
             flash('Name and location are required!', 'error')
             return redirect(url_for('bank.update_bank', bank_id=bank_id))
         
-        bank.name = name
-        bank.location = location
-        db.session.commit()
+        if run_write(update_bank_record, bank_id, {'name': name, 'location': location}) is None:
+            abort(404)
         
         flash('Bank updated successfully!', 'success')
         return redirect(url_for('bank.index'))
     
+    bank = Bank.query.get_or_404(bank_id)
     return render_template('bank_form.html', bank=bank)
 
 @bank_bp.route('/bank/<int:bank_id>/delete', methods=['POST'])
@@ -70,9 +82,8 @@ def delete_bank(bank_id):
     """
     Route to delete a bank
     """
-    bank = Bank.query.get_or_404(bank_id)
-    db.session.delete(bank)
-    db.session.commit()
+    if run_write(delete_bank_record, bank_id) is None:
+        abort(404)
     
     flash('Bank deleted successfully!', 'success')
     return redirect(url_for('bank.index'))
@@ -103,39 +114,33 @@ def create_bank_api():
     if not data or not data.get('name') or not data.get('location'):
         return jsonify({'error': 'Name and location are required!'}), 400
     
-    new_bank = Bank(name=data['name'], location=data['location'])
-    db.session.add(new_bank)
-    db.session.commit()
+    new_bank = run_write(create_bank_record, data['name'], data['location'])
     
-    return jsonify(new_bank.to_dict()), 201
+    return jsonify(new_bank), 201
 
 @bank_bp.route('/api/banks/<int:bank_id>', methods=['PUT'])
 def update_bank_api(bank_id):
     """
     endpoint to update a bank, JSON
     """
-    bank = Bank.query.get_or_404(bank_id)
     data = request.get_json()
     
     if not data:
+        Bank.query.get_or_404(bank_id)
         return jsonify({'error': 'No data provided!'}), 400
     
-    if 'name' in data:
-        bank.name = data['name']
-    if 'location' in data:
-        bank.location = data['location']
-    
-    db.session.commit()
+    bank = run_write(update_bank_record, bank_id, data)
+    if bank is None:
+        abort(404)
     
-    return jsonify(bank.to_dict())
+    return jsonify(bank)
 
 @bank_bp.route('/api/banks/<int:bank_id>', methods=['DELETE'])
 def delete_bank_api(bank_id):
     """
     to delete a bank, JSON
     """
-    bank = Bank.query.get_or_404(bank_id)
-    db.session.delete(bank)
-    db.session.commit()
+    if run_write(delete_bank_record, bank_id) is None:
+        abort(404)
     
     return jsonify({'message': 'Bank deleted successfully!'})
@@ -9,12 +9,33 @@ def create_app(test_config=None):
     load_dotenv()
     app = Flask(__name__)
     app.secret_key = os.getenv('SECRET_KEY', 'dev_key_for_development_only')
+    if os.getenv('DATABASE_URL'):
+        app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL')
+    app.config['ASYNC_DATABASE_URL'] = os.getenv('ASYNC_DATABASE_URL')
+    app.config['LOAN_MODEL_STORE'] = os.getenv('LOAN_MODEL_STORE')
+    app.config['BANK_GROUP_COMMIT'] = os.getenv('BANK_GROUP_COMMIT', '0') == '1'
+    app.config['ADMIN_TOKEN'] = os.getenv('ADMIN_TOKEN')
+    app.config['LOAN_WARMUP'] = os.getenv('LOAN_WARMUP', '1') == '1'
     if test_config is not None:
         app.config.update(test_config)
+    from bank_app.json_provider import init_app as init_json
+    init_json(app)
+    from bank_app.compression import init_app as init_compression
+    init_compression(app)
     from bank_app.db import init_app as init_db
     init_db(app)
+    from bank_app.cache import init_app as init_cache
+    init_cache(app)
+    from bank_app.audit import init_app as init_audit
+    init_audit(app)
+    from bank_app.admission import init_app as init_admission
+    init_admission(app)
     from bank_app.api import init_app as init_api
     init_api(app)
+    from bank_app.profiler import init_app as init_profiler
+    init_profiler(app)
+    from bank_app.warmup import init_app as init_warmup
+    init_warmup(app)
     return app
 
 if __name__ == '__main__':
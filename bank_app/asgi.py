@@ -0,0 +1,24 @@
+from asgiref.wsgi import WsgiToAsgi
+from bank_app.app import create_app
+from bank_app.api.async_routes import AsyncBankAPI
+from bank_app.db.async_db import async_connection_string, same_database
+
+def create_asgi_app(test_config=None, database_url=None):
+    """
+    ASGI entry point: async /api/banks, everything else served by Flask
+
+    the async engine uses Flask's SQLALCHEMY_DATABASE_URI with an asyncio
+    driver; an explicit database_url or ASYNC_DATABASE_URL must point at
+    the same database, or /api/banks and the pages would disagree
+    """
+    flask_app = create_app(test_config)
+    flask_url = flask_app.config['SQLALCHEMY_DATABASE_URI']
+    database_url = database_url or flask_app.config.get('ASYNC_DATABASE_URL')
+    if database_url and not same_database(database_url, flask_url):
+        raise ValueError(f"Async database {database_url} differs from the Flask database {flask_url}")
+    return AsyncBankAPI(
+        async_connection_string(database_url or flask_url),
+        fallback=WsgiToAsgi(flask_app),
+        pool_size=flask_app.config.get('ASYNC_DB_POOL_SIZE', 10),
+        max_overflow=flask_app.config.get('ASYNC_DB_MAX_OVERFLOW', 20)
+    )
@@ -0,0 +1,185 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from flask import current_app
+
+AUDIT_TABLE = 'prediction_audit'
+
+CREATE_TABLE = f'''
+CREATE TABLE IF NOT EXISTS {AUDIT_TABLE} (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    endpoint TEXT NOT NULL,
+    model_version TEXT,
+    latency_ms REAL,
+    batch_size INTEGER,
+    inputs TEXT NOT NULL,
+    outputs TEXT NOT NULL,
+    request_id TEXT,
+    degraded INTEGER NOT NULL DEFAULT 0
+)
+'''
+
+ADDED_COLUMNS = {
+    'request_id': 'request_id TEXT',
+    'degraded': 'degraded INTEGER NOT NULL DEFAULT 0'
+}
+
+INSERT_ROW = f'''
+INSERT INTO {AUDIT_TABLE} (ts, endpoint, model_version, latency_ms, batch_size, inputs, outputs, request_id, degraded)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+def get_audit_db_path():
+    """
+    the SQLite file prediction records are flushed to
+    """
+    return os.path.join(os.path.dirname(os.path.dirname(__file__)), 'audit.db')
+
+class PredictionAuditLog:
+    """
+    bounded in-memory ring buffer of predictions flushed in batches
+
+    record() only appends to a deque; a background thread serialises the
+    records and writes them with one executemany per batch. When the buffer
+    is full the oldest records are dropped and counted rather than blocking
+    the request.
+    """
+    def __init__(self, path, capacity=10000, batch_size=500, flush_interval=1.0):
+        self.path = path
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = deque(maxlen=capacity)
+        self._wakeup = threading.Event()
+        self._write_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+        self.dropped = 0
+        self.written = 0
+
+    def record(self, endpoint, inputs, outputs, model_version, latency_ms, degraded=False):
+        """
+        queue one request's applications and per model outputs
+
+        every row of the request shares one request id, so a replay can
+        send them again as the same batch
+        """
+        self._ensure_started()
+        overflow = len(self._buffer) + len(inputs) - self.capacity
+        if overflow > 0:
+            self.dropped += overflow
+        now = time.time()
+        batch_size = len(inputs)
+        request_id = uuid.uuid4().hex
+        for row_input, row_output in zip(inputs, outputs):
+            self._buffer.append((now, endpoint, model_version, latency_ms, batch_size, row_input, row_output,
+                                 request_id, degraded))
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is None or self._pid != os.getpid():
+                if self._pid is not None and self._pid != os.getpid():
+                    self._buffer.clear()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='prediction-audit', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(CREATE_TABLE)
+        columns = {row[1] for row in conn.execute(f'PRAGMA table_info({AUDIT_TABLE})')}
+        for column, definition in ADDED_COLUMNS.items():
+            if column not in columns:
+                conn.execute(f'ALTER TABLE {AUDIT_TABLE} ADD COLUMN {definition}')
+        return conn
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            while not self._stopping:
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+                self._flush(conn)
+        finally:
+            self._flush(conn)
+            conn.close()
+
+    def _drain(self):
+        rows = []
+        while self._buffer and len(rows) < self.batch_size:
+            try:
+                rows.append(self._buffer.popleft())
+            except IndexError:
+                break
+        return rows
+
+    def _flush(self, conn):
+        with self._write_lock:
+            while True:
+                rows = self._drain()
+                if not rows:
+                    return
+                conn.executemany(INSERT_ROW, [
+                    (ts, endpoint, version, latency, size, json.dumps(row_input), json.dumps(row_output),
+                     request_id, int(degraded))
+                    for ts, endpoint, version, latency, size, row_input, row_output, request_id, degraded in rows
+                ])
+                conn.commit()
+                self.written += len(rows)
+
+    def flush(self):
+        """
+        write everything buffered so far from the calling thread
+        """
+        conn = self._connect()
+        try:
+            self._flush(conn)
+        finally:
+            conn.close()
+
+    def close(self):
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(5)
+
+def record_prediction(endpoint, input_df, results, model_version, started, degraded=False):
+    """
+    audit a scored request; started is its time.perf_counter() start
+    """
+    audit_log = current_app.extensions.get('prediction_audit')
+    if audit_log is None:
+        return
+    latency_ms = (time.perf_counter() - started) * 1000
+    outputs = [
+        {'prediction': result['prediction'], 'probability': result['probability'], 'votes': result['votes']}
+        for result in results
+    ]
+    audit_log.record(endpoint, input_df.to_dict(orient='records'), outputs, model_version, latency_ms, degraded)
+
+def init_app(app):
+    """
+    attach the prediction audit log unless LOAN_AUDIT_ENABLED is false
+    """
+    if not app.config.get('LOAN_AUDIT_ENABLED', True):
+        return
+    app.extensions['prediction_audit'] = PredictionAuditLog(
+        app.config.get('LOAN_AUDIT_DB') or get_audit_db_path(),
+        capacity=app.config.get('LOAN_AUDIT_CAPACITY', 10000),
+        batch_size=app.config.get('LOAN_AUDIT_BATCH_SIZE', 500),
+        flush_interval=app.config.get('LOAN_AUDIT_FLUSH_INTERVAL', 1.0)
+    )
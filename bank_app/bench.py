@@ -0,0 +1,83 @@
+import argparse
+import time
+from bank_app.app import create_app
+from bank_app.db.models import db, Bank
+
+ENCODINGS = ('identity', 'gzip', 'deflate')
+
+def seed_banks(app, count):
+    with app.app_context():
+        db.session.add_all([Bank(name=f'Bench Bank {i}', location=f'Bench City {i % 97}') for i in range(count)])
+        db.session.commit()
+
+def loan_batch(size):
+    statuses = ['employed', 'self-employed', 'unemployed']
+    return [
+        {
+            'income': 25000 + (i * 137) % 60000,
+            'credit_score': 520 + (i * 7) % 260,
+            'loan_amount': 4000 + (i * 53) % 36000,
+            'loan_term': 12 + (i % 5) * 12,
+            'employment_status': statuses[i % 3]
+        }
+        for i in range(size)
+    ]
+
+def time_encode(app, payload, repeat):
+    provider = app.json
+    start = time.perf_counter()
+    for _ in range(repeat):
+        provider.dumps_bytes(payload)
+    return (time.perf_counter() - start) / repeat * 1000
+
+def measure(app, method, path, payload=None, repeat=20):
+    """
+    encode time of the response payload and bytes on the wire per encoding
+    """
+    client = app.test_client()
+    call = getattr(client, method)
+    kwargs = {'json': payload} if payload is not None else {}
+
+    response = call(path, **kwargs)
+    if response.status_code >= 400:
+        return None
+    body = response.get_json()
+
+    row = {'endpoint': f'{method.upper()} {path}', 'encode_ms': time_encode(app, body, repeat)}
+    for encoding in ENCODINGS:
+        response = call(path, headers={'Accept-Encoding': encoding}, **kwargs)
+        row[encoding] = len(response.get_data())
+    return row
+
+def run(banks=5000, batch=500, repeat=20):
+    rows = []
+    for fast in (False, True):
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+            'JSON_FAST_ENCODER': fast,
+            'LOAN_AUDIT_ENABLED': False
+        })
+        seed_banks(app, banks)
+        for method, path, payload in (
+            ('get', '/api/banks', None),
+            ('get', '/api/banks/1', None),
+            ('post', '/loan/api/predict', loan_batch(batch))
+        ):
+            row = measure(app, method, path, payload, repeat)
+            if row is not None:
+                row['encoder'] = app.json.encoder_name
+                rows.append(row)
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark API response encoding and compression")
+    parser.add_argument('--banks', type=int, default=5000)
+    parser.add_argument('--batch', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'endpoint':<24}{'encoder':<9}{'encode ms':>10}" + ''.join(f'{name:>11}' for name in ENCODINGS))
+    for row in run(args.banks, args.batch, args.repeat):
+        print(f"{row['endpoint']:<24}{row['encoder']:<9}{row['encode_ms']:>10.3f}"
+              + ''.join(f'{row[name]:>11}' for name in ENCODINGS))
@@ -0,0 +1,115 @@
+import threading
+from collections import OrderedDict
+from flask import current_app, render_template
+from sqlalchemy import select
+from bank_app.db.models import db, BankVersion, GLOBAL_VERSION
+from markupsafe import Markup
+
+FRAGMENT_TEMPLATES = {
+    'card': '_bank_card.html',
+    'detail': '_bank_detail.html'
+}
+
+class FragmentCache:
+    """
+    LRU cache of rendered bank fragments keyed on bank id and version
+
+    versions come from the bank_versions table, which every bank mutation
+    bumps in its own transaction, so a write made by any worker or
+    process changes the keys every other worker looks up; stale fragments
+    are never read again and age out of the LRU. Each worker keeps its
+    own copy of the rendered fragments.
+    """
+    def __init__(self, max_entries=1024, enabled=True):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+def get_cache():
+    return current_app.extensions['fragment_cache']
+
+def get_fragment_template(kind):
+    return current_app.extensions['fragment_templates'][kind]
+
+def list_version():
+    """
+    version of the whole bank list, the global version
+    """
+    return db.session.scalar(select(BankVersion.version).where(BankVersion.bank_id == GLOBAL_VERSION)) or 0
+
+def bank_version(bank_id):
+    """
+    version of one bank; banks without a row (never changed through the
+    app, or deleted) fall back to the global version
+    """
+    query = select(BankVersion.bank_id, BankVersion.version).where(BankVersion.bank_id.in_((bank_id, GLOBAL_VERSION)))
+    versions = dict(db.session.execute(query).all())
+    return versions.get(bank_id, versions.get(GLOBAL_VERSION, 0))
+
+def bank_versions():
+    """
+    current version of every bank, in one query
+    """
+    return dict(db.session.execute(select(BankVersion.bank_id, BankVersion.version)).all())
+
+def render_fragment(kind, bank, version):
+    """
+    rendered fragment for a bank, from the cache when its version is current
+    """
+    cache = get_cache()
+    key = (kind, bank.id, version)
+    html = cache.get(key)
+    if html is None:
+        html = Markup(render_template(get_fragment_template(kind), bank=bank))
+        cache.set(key, html)
+    return html
+
+def detail_key(bank_id):
+    """
+    cache key for a bank's detail fragment; take it before querying the bank
+    so a write landing mid-render cannot be cached under the new version
+    """
+    return ('detail', bank_id, bank_version(bank_id))
+
+def list_key():
+    return ('list', list_version())
+
+def init_app(app):
+    """
+    attach the fragment cache and compile the fragment templates up front
+    """
+    app.extensions['fragment_cache'] = FragmentCache(
+        max_entries=app.config.get('FRAGMENT_CACHE_SIZE', 1024),
+        enabled=app.config.get('FRAGMENT_CACHE_ENABLED', True)
+    )
+    app.extensions['fragment_templates'] = {
+        kind: app.jinja_env.get_template(name) for kind, name in FRAGMENT_TEMPLATES.items()
+    }
@@ -0,0 +1,94 @@
+import zlib
+from flask import request
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/html', 'text/css', 'text/plain', 'application/javascript')
+
+WBITS = {
+    'gzip': 31,
+    'deflate': 15
+}
+
+def choose_encoding(accept_encoding):
+    """
+    gzip or deflate, whichever the client accepts with the higher q value;
+    q=0 means the client refuses that encoding
+    """
+    best = None
+    best_q = 0.0
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if name not in WBITS:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if q <= 0:
+            continue
+        if q > best_q or (q == best_q and name == 'gzip'):
+            best, best_q = name, q
+    return best
+
+def compress(data, encoding, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, WBITS[encoding])
+    return compressor.compress(data) + compressor.flush()
+
+def compress_stream(chunks, encoding, level, chunk_size):
+    """
+    compress an iterable of byte chunks, yielding output as it is produced
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, WBITS[encoding])
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        for start in range(0, len(chunk), chunk_size):
+            out = compressor.compress(chunk[start:start + chunk_size])
+            if out:
+                yield out
+    yield compressor.flush()
+
+def compress_response(response, config):
+    """
+    after_request hook negotiating gzip/deflate for large enough bodies
+
+    bodies above COMPRESS_STREAM_THRESHOLD, and responses that are already
+    streamed, are compressed chunk by chunk instead of in one buffer
+    """
+    if not config.get('COMPRESS_ENABLED', True):
+        return response
+    if response.status_code < 200 or response.status_code in (204, 304) or response.direct_passthrough:
+        return response
+    if 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_TYPES:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.headers.get('Accept-Encoding', ''))
+    if encoding is None:
+        return response
+
+    level = config.get('COMPRESS_LEVEL', 6)
+    chunk_size = config.get('COMPRESS_CHUNK_SIZE', 64 * 1024)
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding, level, chunk_size)
+        response.headers.pop('Content-Length', None)
+    else:
+        size = response.content_length or len(response.get_data())
+        if size < config.get('COMPRESS_MIN_SIZE', 1024):
+            return response
+        if size >= config.get('COMPRESS_STREAM_THRESHOLD', 1024 * 1024):
+            body = response.get_data()
+            response.response = compress_stream([body], encoding, level, chunk_size)
+            response.headers.pop('Content-Length', None)
+        else:
+            response.set_data(compress(response.get_data(), encoding, level))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+def init_app(app):
+    @app.after_request
+    def _compress(response):
+        return compress_response(response, app.config)
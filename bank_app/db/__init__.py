@@ -13,13 +13,21 @@ def init_app(app):
     """
     the database with the Flask app
     """
-    app.config['SQLALCHEMY_DATABASE_URI'] = get_db_connection_string()
+    app.config.setdefault('SQLALCHEMY_DATABASE_URI', get_db_connection_string())
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
     db.init_app(app)
     
     with app.app_context():
         db.create_all()
+    
+    if app.config.get('BANK_GROUP_COMMIT'):
+        from .writer import GroupCommitWriter
+        app.extensions['bank_writer'] = GroupCommitWriter(
+            app,
+            window=app.config.get('BANK_GROUP_COMMIT_WINDOW', 0.005),
+            max_batch=app.config.get('BANK_GROUP_COMMIT_MAX_BATCH', 256)
+        )
 
 def create_tables():
     """
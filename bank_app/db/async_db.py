@@ -0,0 +1,59 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from . import get_db_connection_string
+from .models import db
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'mysql': 'mysql+aiomysql'
+}
+
+def async_connection_string(database_url=None):
+    """
+    the async form of a database URL, by default the Flask app's bank.db
+
+    the sync driver is swapped for its asyncio counterpart, so Flask and
+    the async API always talk to the same database
+    """
+    url = make_url(database_url or get_db_connection_string())
+    if url.drivername in ASYNC_DRIVERS.values():
+        return url.render_as_string(hide_password=False)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver known for {url.get_backend_name()} databases")
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+def same_database(url_a, url_b):
+    """
+    whether two URLs point at the same database, whatever their drivers
+    """
+    url_a, url_b = make_url(url_a), make_url(url_b)
+    return url_a.set(drivername=url_a.get_backend_name()) == url_b.set(drivername=url_b.get_backend_name())
+
+def create_engine(database_url=None, pool_size=10, max_overflow=20):
+    """
+    async engine for the bank database
+
+    server databases get a pooled engine; SQLite keeps SQLAlchemy's default
+    pool since all connections share one file lock anyway
+    """
+    database_url = async_connection_string(database_url)
+    if database_url.startswith('sqlite'):
+        return create_async_engine(database_url)
+    return create_async_engine(
+        database_url,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_pre_ping=True
+    )
+
+def create_sessionmaker(engine):
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+async def create_tables(engine):
+    """
+    create the tables of the shared models if they do not exist
+    """
+    async with engine.begin() as conn:
+        await conn.run_sync(db.metadata.create_all)
@@ -28,3 +28,43 @@ class Bank(db.Model):
             'name': self.name,
             'location': self.location
         }
+
+GLOBAL_VERSION = 0
+
+class BankVersion(db.Model):
+    """
+    current version of every bank, plus the global version under bank_id 0
+
+    every bank mutation bumps the global version and stamps the bank's row
+    with it in the same transaction, so a write made by any worker changes
+    the versions every other worker reads. The table holds one row per
+    live bank and stays bounded; deleting a bank removes its row.
+    """
+    __tablename__ = 'bank_versions'
+
+    bank_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    version = db.Column(db.Integer, nullable=False)
+
+db.event.listen(
+    BankVersion.__table__,
+    'after_create',
+    db.DDL(f"INSERT INTO bank_versions (bank_id, version) VALUES ({GLOBAL_VERSION}, 0)")
+)
+
+def version_bump(bank_id, deleted=False):
+    """
+    statements recording a change to bank_id, run inside the writing transaction
+
+    the global row is updated first, which serialises concurrent writers on
+    that row, so replacing the bank's row afterwards cannot race
+    """
+    statements = [
+        db.update(BankVersion)
+        .where(BankVersion.bank_id == GLOBAL_VERSION)
+        .values(version=BankVersion.version + 1),
+        db.delete(BankVersion).where(BankVersion.bank_id == bank_id)
+    ]
+    if not deleted:
+        current = db.select(db.literal(bank_id), BankVersion.version).where(BankVersion.bank_id == GLOBAL_VERSION)
+        statements.append(db.insert(BankVersion).from_select(['bank_id', 'version'], current))
+    return statements
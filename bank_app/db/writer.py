@@ -0,0 +1,164 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from flask import current_app
+from .models import db, Bank, version_bump
+
+def record_change(session, bank_id, deleted=False):
+    """
+    bump the version of a bank in the session's transaction
+    """
+    for statement in version_bump(bank_id, deleted):
+        session.execute(statement)
+
+def create_bank_record(session, name, location):
+    """
+    add a bank and return its dictionary, including the new id
+    """
+    bank = Bank(name=name, location=location)
+    session.add(bank)
+    session.flush()
+    record_change(session, bank.id)
+    return bank.to_dict()
+
+def update_bank_record(session, bank_id, changes):
+    """
+    apply changes to a bank, returning None if it does not exist
+    """
+    bank = session.get(Bank, bank_id)
+    if bank is None:
+        return None
+    if 'name' in changes:
+        bank.name = changes['name']
+    if 'location' in changes:
+        bank.location = changes['location']
+    session.flush()
+    record_change(session, bank_id)
+    return bank.to_dict()
+
+def delete_bank_record(session, bank_id):
+    """
+    delete a bank, returning its last dictionary or None if it does not exist
+    """
+    bank = session.get(Bank, bank_id)
+    if bank is None:
+        return None
+    data = bank.to_dict()
+    session.delete(bank)
+    session.flush()
+    record_change(session, bank_id, deleted=True)
+    return data
+
+class GroupCommitWriter:
+    """
+    single writer thread merging bank mutations into shared transactions
+
+    operations arriving within window seconds of the first one in a batch
+    are applied in one transaction with a single commit. Each caller's
+    future is resolved only after that commit, so a caller reading after
+    its write sees it. If the merged transaction fails, the batch is
+    replayed one operation per transaction so only the bad operation fails.
+    Operations whose future was cancelled before the batch started (the
+    caller timed out) are dropped instead of applied.
+    """
+    def __init__(self, app, window=0.005, max_batch=256):
+        self.app = app
+        self.window = window
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.operations = 0
+
+    def _ensure_started(self):
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='bank-group-commit', daemon=True)
+                self._thread.start()
+
+    def submit(self, operation, *args):
+        """
+        queue operation(session, *args) and return a future for its result
+        """
+        self._ensure_started()
+        future = Future()
+        self._queue.put((operation, args, future))
+        return future
+
+    def stop(self, timeout=None):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                first = self._queue.get()
+                if first is None:
+                    break
+                batch = [item for item in self._collect(first) if item[2].set_running_or_notify_cancel()]
+                if not batch:
+                    continue
+                self.batches += 1
+                self.operations += len(batch)
+                self._apply(batch)
+                db.session.remove()
+
+    def _apply(self, batch):
+        session = db.session
+        try:
+            results = [operation(session, *args) for operation, args, _ in batch]
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            if len(batch) == 1:
+                batch[0][2].set_exception(e)
+                return
+            for item in batch:
+                self._apply([item])
+            return
+        for (_, _, future), result in zip(batch, results):
+            future.set_result(result)
+
+def run_write(operation, *args):
+    """
+    run a bank mutation, through the group commit writer when it is enabled
+    """
+    writer = current_app.extensions.get('bank_writer')
+    if writer is None:
+        result = operation(db.session, *args)
+        db.session.commit()
+        return result
+    timeout = current_app.config.get('BANK_GROUP_COMMIT_TIMEOUT', 30)
+    future = writer.submit(operation, *args)
+    try:
+        return future.result(timeout)
+    except TimeoutError:
+        if future.cancel():
+            raise
+        # already being applied, so report how it actually ended
+        return future.result()
@@ -0,0 +1,66 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider using orjson when it is installed, the standard library otherwise
+
+    dates and dataclasses are passed back to Flask's default() so they are
+    encoded as the standard provider would; numpy values are serialised
+    natively. The output is equivalent JSON but not always the same bytes:
+    orjson writes non-ASCII characters as UTF-8 instead of \\u escapes.
+    """
+    def __init__(self, app, use_fast=True):
+        super().__init__(app)
+        self.use_fast = use_fast and orjson is not None
+
+    @property
+    def encoder_name(self):
+        return 'orjson' if self.use_fast else 'json'
+
+    def _options(self, indent=None):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | \
+            orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _can_use_fast(self, kwargs):
+        return self.use_fast and not (set(kwargs) - {'indent', 'separators', 'default'})
+
+    def dumps_bytes(self, obj, indent=None):
+        """
+        UTF-8 encoded JSON without a round trip through str
+        """
+        if self.use_fast:
+            return orjson.dumps(obj, default=self.default, option=self._options(indent))
+        separators = None if indent else (',', ':')
+        return super().dumps(obj, indent=indent, separators=separators).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if self._can_use_fast(kwargs):
+            return orjson.dumps(obj, default=kwargs.get('default', self.default),
+                                option=self._options(kwargs.get('indent'))).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.use_fast and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if (self.compact is None and self._app.debug) or self.compact is False else None
+        return self._app.response_class(self.dumps_bytes(obj, indent) + b'\n', mimetype=self.mimetype)
+
+def init_app(app):
+    """
+    install the fast JSON provider unless JSON_FAST_ENCODER is false
+    """
+    app.json = FastJSONProvider(app, use_fast=app.config.get('JSON_FAST_ENCODER', True))
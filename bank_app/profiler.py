@@ -0,0 +1,276 @@
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import random
+import signal
+import sys
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+from flask import Blueprint, current_app, has_app_context, request, jsonify, abort, Response
+
+PROFILER_MODES = ('sample', 'cprofile')
+
+admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
+
+def _frame_name(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class RequestProfiler:
+    """
+    on-demand profiler for a configurable fraction of requests
+
+    in 'sample' mode a background thread reads the stacks of the request
+    threads being profiled every interval seconds and counts collapsed
+    stacks per route, prefixed with the current scoring stage. In
+    'cprofile' mode each sampled request runs under cProfile and the
+    statistics are merged per route. Nothing runs while it is disabled.
+    """
+    def __init__(self, sample_rate=0.1, interval=0.005, mode='sample', max_depth=64):
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.mode = mode
+        self.max_depth = max_depth
+        self.enabled = False
+        self._active = {}
+        self._stages = {}
+        self._profiles = {}
+        self._stacks = defaultdict(Counter)
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def configure(self, enabled=None, sample_rate=None, interval=None, mode=None):
+        if mode is not None:
+            if mode not in PROFILER_MODES:
+                raise ValueError(f"Unknown profiler mode: {mode}")
+            self.mode = mode
+        if sample_rate is not None:
+            self.sample_rate = min(max(float(sample_rate), 0.0), 1.0)
+        if interval is not None:
+            self.interval = max(float(interval), 0.0005)
+        if enabled is not None:
+            self.enable() if enabled else self.disable()
+
+    def enable(self):
+        self.enabled = True
+        if self.mode == 'sample' and (self._thread is None or not self._thread.is_alive()):
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._sample_loop, name='request-profiler', daemon=True)
+            self._thread.start()
+
+    def disable(self):
+        self.enabled = False
+        self._stop.set()
+
+    def toggle(self):
+        self.disable() if self.enabled else self.enable()
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self._stats.clear()
+
+    def start_request(self, route):
+        if not self.enabled or random.random() >= self.sample_rate:
+            return
+        thread_id = threading.get_ident()
+        self._active[thread_id] = route
+        self._stages[thread_id] = []
+        if self.mode == 'cprofile':
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                return
+            self._profiles[thread_id] = profile
+
+    def end_request(self):
+        thread_id = threading.get_ident()
+        route = self._active.pop(thread_id, None)
+        self._stages.pop(thread_id, None)
+        profile = self._profiles.pop(thread_id, None)
+        if profile is not None:
+            profile.disable()
+            with self._lock:
+                if route in self._stats:
+                    self._stats[route].add(profile)
+                else:
+                    self._stats[route] = pstats.Stats(profile)
+
+    @contextmanager
+    def stage(self, name):
+        """
+        tag samples taken inside the block with a stage name
+        """
+        stages = self._stages.get(threading.get_ident())
+        if stages is None:
+            yield
+            return
+        stages.append(name)
+        try:
+            yield
+        finally:
+            stages.pop()
+
+    def _collapse(self, frame):
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            names.append(_frame_name(frame.f_code))
+            frame = frame.f_back
+        names.reverse()
+        return names
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.interval):
+            if not self._active:
+                continue
+            frames = sys._current_frames()
+            samples = []
+            for thread_id, route in list(self._active.items()):
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stages = self._stages.get(thread_id) or ['request']
+                samples.append((route, ';'.join([f'stage:{stages[-1]}'] + self._collapse(frame))))
+            del frames
+            with self._lock:
+                for route, stack in samples:
+                    self._stacks[route][stack] += 1
+
+    def collapsed(self, route=None):
+        """
+        flamegraph.pl / speedscope collapsed stack lines
+        """
+        lines = []
+        with self._lock:
+            for name, stacks in self._stacks.items():
+                if route is not None and name != route:
+                    continue
+                for stack, count in stacks.most_common():
+                    lines.append(f'{name};{stack} {count}')
+        return '\n'.join(lines) + ('\n' if lines else '')
+
+    def cprofile_report(self, route=None, limit=40):
+        out = io.StringIO()
+        with self._lock:
+            for name, stats in self._stats.items():
+                if route is not None and name != route:
+                    continue
+                out.write(f'=== {name} ===\n')
+                stats.stream = out
+                stats.sort_stats('cumulative').print_stats(limit)
+        return out.getvalue()
+
+    def status(self):
+        with self._lock:
+            routes = {name: sum(stacks.values()) for name, stacks in self._stacks.items()}
+            routes.update({name: stats.total_calls for name, stats in self._stats.items() if name not in routes})
+        return {
+            'enabled': self.enabled,
+            'mode': self.mode,
+            'sample_rate': self.sample_rate,
+            'interval': self.interval,
+            'routes': routes
+        }
+
+def get_profiler():
+    return current_app.extensions['request_profiler']
+
+def current_stage(name):
+    """
+    stage hook for the scoring engine, routed to the current app's profiler
+    """
+    if not has_app_context():
+        return nullcontext()
+    profiler = current_app.extensions.get('request_profiler')
+    if profiler is None:
+        return nullcontext()
+    return profiler.stage(name)
+
+@admin_bp.before_request
+def require_admin_token():
+    token = current_app.config.get('ADMIN_TOKEN')
+    if not token:
+        abort(404)
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', '').encode(), token.encode()):
+        abort(403)
+
+@admin_bp.route('/profiler', methods=['GET'])
+def profiler_status():
+    """
+    current profiler settings and sample counts per route
+    """
+    return jsonify(get_profiler().status())
+
+@admin_bp.route('/profiler', methods=['POST'])
+def configure_profiler():
+    """
+    switch the profiler on or off and change its settings, JSON
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        get_profiler().configure(
+            enabled=data.get('enabled'),
+            sample_rate=data.get('sample_rate'),
+            interval=data.get('interval'),
+            mode=data.get('mode')
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(get_profiler().status())
+
+@admin_bp.route('/profiler', methods=['DELETE'])
+def reset_profiler():
+    get_profiler().reset()
+    return jsonify({'message': 'Profiler data cleared'})
+
+@admin_bp.route('/profiler/collapsed', methods=['GET'])
+def profiler_collapsed():
+    """
+    collapsed stacks, ready for flamegraph.pl or speedscope
+    """
+    return Response(get_profiler().collapsed(request.args.get('route')), mimetype='text/plain')
+
+@admin_bp.route('/profiler/cprofile', methods=['GET'])
+def profiler_cprofile():
+    return Response(get_profiler().cprofile_report(request.args.get('route')), mimetype='text/plain')
+
+def init_app(app):
+    """
+    attach the request profiler, its admin endpoints and scoring stage hook
+    """
+    profiler = RequestProfiler(
+        sample_rate=app.config.get('PROFILER_SAMPLE_RATE', 0.1),
+        interval=app.config.get('PROFILER_INTERVAL', 0.005),
+        mode=app.config.get('PROFILER_MODE', 'sample')
+    )
+    app.extensions['request_profiler'] = profiler
+    app.register_blueprint(admin_bp)
+
+    @app.before_request
+    def _start_profile():
+        if profiler.enabled:
+            rule = request.url_rule.rule if request.url_rule is not None else request.path
+            profiler.start_request(f'{request.method} {rule}')
+
+    @app.teardown_request
+    def _end_profile(exc):
+        if profiler._active:
+            profiler.end_request()
+
+    from ensemble import set_stage_hook
+    set_stage_hook(current_stage)
+
+    if app.config.get('PROFILER_ENABLED'):
+        profiler.enable()
+
+    signal_name = app.config.get('PROFILER_SIGNAL', 'SIGUSR2')
+    if signal_name and hasattr(signal, signal_name):
+        try:
+            signal.signal(getattr(signal, signal_name), lambda signum, frame: profiler.toggle())
+        except ValueError:
+            pass
@@ -0,0 +1,47 @@
+import os
+import pickle
+import sys
+import pytest
+
+LOAN_PREDICTION_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'loan_prediction')
+sys.path.append(LOAN_PREDICTION_DIR)
+
+@pytest.fixture(scope='session')
+def trained_model_dir(tmp_path_factory):
+    """
+    a default bundle trained on the sample data, without the grid search
+    """
+    from sklearn.neighbors import KNeighborsClassifier
+    from sklearn.tree import DecisionTreeClassifier
+    from preprocess import load_data, preprocess_data
+
+    data = load_data(os.path.join(LOAN_PREDICTION_DIR, 'data', 'loan_data.csv'))
+    X_train, X_test, y_train, y_test, preprocessor = preprocess_data(data)
+    models = {
+        'preprocessor.pkl': preprocessor,
+        'decision_tree_model.pkl': DecisionTreeClassifier(max_depth=5, random_state=42).fit(X_train, y_train),
+        'knn_model.pkl': KNeighborsClassifier(n_neighbors=3).fit(X_train, y_train)
+    }
+    model_dir = tmp_path_factory.mktemp('models')
+    for filename, model in models.items():
+        with open(model_dir / filename, 'wb') as f:
+            pickle.dump(model, f)
+    return model_dir
+
+@pytest.fixture
+def sample_applications():
+    """
+    random raw applications covering every employment status
+    """
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    n = 25
+    return pd.DataFrame({
+        'income': rng.uniform(10000, 150000, n),
+        'credit_score': rng.uniform(300, 850, n),
+        'loan_amount': rng.uniform(1000, 60000, n),
+        'loan_term': rng.choice([12, 24, 36, 48, 60], n),
+        'employment_status': rng.choice(['employed', 'self-employed', 'unemployed'], n)
+    })
@@ -0,0 +1,86 @@
+import asyncio
+import json
+import pytest
+
+pytest.importorskip('aiosqlite')
+
+from bank_app.api.async_routes import AsyncBankAPI
+
+def call(api, method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b''
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        await api({'type': 'http', 'method': method, 'path': path}, receive, send)
+
+    api.loop.run_until_complete(run())
+    return sent[0]['status'], json.loads(sent[1]['body'])
+
+@pytest.fixture
+def api(tmp_path):
+    loop = asyncio.new_event_loop()
+    changed = []
+    api = AsyncBankAPI(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}", on_change=changed.append)
+    api.loop = loop
+    api.changed = changed
+    from bank_app.db.async_db import create_tables
+    loop.run_until_complete(create_tables(api.engine))
+    yield api
+    loop.run_until_complete(api.engine.dispose())
+    loop.close()
+
+def test_async_create_and_list(api):
+    status, data = call(api, 'POST', '/api/banks', {'name': 'Async Bank', 'location': 'Async Location'})
+    assert status == 201
+    assert data['name'] == 'Async Bank'
+    assert api.changed == [data['id']]
+
+    status, data = call(api, 'GET', '/api/banks')
+    assert status == 200
+    assert [bank['name'] for bank in data] == ['Async Bank']
+
+def test_async_update_and_delete(api):
+    _, created = call(api, 'POST', '/api/banks', {'name': 'Async Bank', 'location': 'Async Location'})
+
+    status, data = call(api, 'PUT', f"/api/banks/{created['id']}", {'location': 'Moved'})
+    assert status == 200
+    assert data['location'] == 'Moved'
+
+    status, _ = call(api, 'DELETE', f"/api/banks/{created['id']}")
+    assert status == 200
+    status, _ = call(api, 'GET', f"/api/banks/{created['id']}")
+    assert status == 404
+
+def test_async_create_requires_fields(api):
+    status, data = call(api, 'POST', '/api/banks', {'name': 'No Location'})
+    assert status == 400
+    assert data['error'] == 'Name and location are required!'
+
+def test_async_url_follows_the_flask_database():
+    from bank_app.db.async_db import async_connection_string
+    assert async_connection_string('sqlite:////data/bank.db') == 'sqlite+aiosqlite:////data/bank.db'
+    assert async_connection_string('postgresql://bank:secret@db/bank') == 'postgresql+asyncpg://bank:secret@db/bank'
+    assert async_connection_string('postgresql+asyncpg://bank:secret@db/bank') == 'postgresql+asyncpg://bank:secret@db/bank'
+    with pytest.raises(ValueError):
+        async_connection_string('oracle://bank@db/bank')
+
+def test_asgi_app_shares_the_flask_database(tmp_path):
+    from bank_app.asgi import create_asgi_app
+    config = {
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'shared.db'}",
+        'LOAN_WARMUP': False,
+        'LOAN_AUDIT_ENABLED': False
+    }
+    api = create_asgi_app(config)
+    assert api.engine.url.drivername == 'sqlite+aiosqlite'
+    assert api.engine.url.database == str(tmp_path / 'shared.db')
+
+    with pytest.raises(ValueError):
+        create_asgi_app(dict(config, ASYNC_DATABASE_URL=f"sqlite+aiosqlite:///{tmp_path / 'other.db'}"))
@@ -0,0 +1,75 @@
+import sqlite3
+from bank_app.audit import PredictionAuditLog, AUDIT_TABLE
+
+def test_audit_log_flushes_batches(tmp_path):
+    path = str(tmp_path / 'audit.db')
+    audit_log = PredictionAuditLog(path, capacity=100, batch_size=2, flush_interval=60)
+    inputs = [{'income': 70000.0}, {'income': 20000.0}, {'income': 50000.0}]
+    outputs = [{'prediction': 1}, {'prediction': 0}, {'prediction': 1}]
+    audit_log.record('/loan/api/predict', inputs, outputs, 'default', 3.5)
+    audit_log.close()
+
+    conn = sqlite3.connect(path)
+    rows = conn.execute(f'SELECT endpoint, model_version, batch_size FROM {AUDIT_TABLE}').fetchall()
+    conn.close()
+    assert rows == [('/loan/api/predict', 'default', 3)] * 3
+    assert audit_log.written == 3
+
+def test_audit_log_drops_oldest_when_full(tmp_path):
+    audit_log = PredictionAuditLog(str(tmp_path / 'audit.db'), capacity=2, batch_size=100, flush_interval=60)
+    audit_log._ensure_started = lambda: None
+    audit_log.record('/loan/predict', [{'n': 1}, {'n': 2}, {'n': 3}], [{}, {}, {}], 'default', 1.0)
+    assert audit_log.dropped == 1
+    assert [row[5] for row in audit_log._buffer] == [{'n': 2}, {'n': 3}]
+
+def test_audit_log_adds_columns_to_old_tables(tmp_path):
+    path = str(tmp_path / 'audit.db')
+    conn = sqlite3.connect(path)
+    conn.execute(f'CREATE TABLE {AUDIT_TABLE} (id INTEGER PRIMARY KEY AUTOINCREMENT, ts REAL NOT NULL, '
+                 'endpoint TEXT NOT NULL, model_version TEXT, latency_ms REAL, batch_size INTEGER, '
+                 'inputs TEXT NOT NULL, outputs TEXT NOT NULL)')
+    conn.commit()
+    conn.close()
+
+    audit_log = PredictionAuditLog(path, flush_interval=60)
+    audit_log.record('/loan/api/predict', [{'income': 1.0}], [{'prediction': 1}], 'default', 1.0, degraded=True)
+    audit_log.close()
+
+    conn = sqlite3.connect(path)
+    rows = conn.execute(f'SELECT request_id, degraded FROM {AUDIT_TABLE}').fetchall()
+    conn.close()
+    assert len(rows) == 1 and rows[0][0] and rows[0][1] == 1
+
+class FlipRouter:
+    """
+    bundle stand-in approving every application, recording batch sizes
+    """
+    def __init__(self):
+        self.batches = []
+
+    def get(self, version):
+        return self
+
+    def predict(self, input_df):
+        self.batches.append(len(input_df))
+        return [{'prediction': 1} for _ in range(len(input_df))]
+
+def test_replay_sends_logged_requests_as_batches(tmp_path):
+    from replay import load_audit_records, group_requests, replay
+    path = str(tmp_path / 'audit.db')
+    audit_log = PredictionAuditLog(path, flush_interval=60)
+    audit_log.record('/loan/api/predict', [{'n': 1}, {'n': 2}, {'n': 3}],
+                     [{'prediction': 0}, {'prediction': 1}, {'prediction': 1}], 'default', 1.0)
+    audit_log.record('/loan/api/predict', [{'n': 4}, {'n': 5}],
+                     [{'prediction': 0}, {'prediction': 0}], 'default', 1.0, degraded=True)
+    audit_log.record('/loan/predict', [{'n': 6}], [{'prediction': 0}], 'default', 1.0)
+    audit_log.close()
+
+    requests = group_requests(load_audit_records(path))
+    router = FlipRouter()
+    summary = replay(requests, router, speed=0)
+    assert router.batches == [3, 2, 1]
+    assert summary['requests'] == 3
+    assert summary['applications'] == 6
+    assert summary['degraded_skipped'] == 2
+    assert summary['decisions_changed'] == 2
@@ -0,0 +1,42 @@
+import pickle
+import numpy as np
+import pytest
+from sklearn.neighbors import KNeighborsClassifier
+from ensemble import load_bundle
+from compact import UNKNOWN_CODE, compact_knn, encode_categories
+
+def test_encode_categories_marks_unknown_rows():
+    onehot = np.array([[1, 0, 0], [0, 0, 1], [0, 0, 0], [0, 1, 0]])
+    assert encode_categories(onehot).tolist() == [0, 2, UNKNOWN_CODE, 1]
+
+@pytest.fixture
+def knn_data(trained_model_dir, sample_applications):
+    bundle = load_bundle(str(trained_model_dir))
+    applications = sample_applications.copy()
+    applications.loc[:4, 'employment_status'] = 'retired'
+    return bundle.member('knn'), bundle.preprocessor.transform(applications)
+
+@pytest.mark.parametrize('storage', ['float32', 'int16'])
+@pytest.mark.parametrize('metric', [{'metric': 'euclidean'}, {'metric': 'manhattan'}, {'metric': 'minkowski', 'p': 3}])
+def test_compact_knn_matches_sklearn(knn_data, storage, metric):
+    fitted, X = knn_data
+    knn = KNeighborsClassifier(n_neighbors=3, weights='distance', **metric).fit(fitted._fit_X, fitted._y)
+    compact = compact_knn(knn, storage=storage)
+    compact.block_size = 7
+
+    distances, indices = knn.kneighbors(X)
+    compact_distances, compact_indices = compact.kneighbors(X)
+    tolerance = 1e-4 if storage == 'float32' else 1e-2
+    np.testing.assert_allclose(compact_distances, distances, atol=tolerance)
+    np.testing.assert_array_equal(compact_indices, indices)
+    np.testing.assert_array_equal(compact.predict(X), knn.predict(X))
+    assert compact.nbytes < fitted._fit_X.nbytes
+
+@pytest.mark.parametrize('storage', ['float32', 'int16'])
+def test_compact_knn_pickles_smaller_than_sklearn(knn_data, storage):
+    fitted, _ = knn_data
+    compact = compact_knn(fitted, storage=storage)
+    pickled = len(pickle.dumps(compact))
+    assert pickled < len(pickle.dumps(fitted))
+    assert compact.nbytes <= pickled
+    assert compact.nbytes >= compact.numeric.nbytes + compact._sq_norms.nbytes
@@ -0,0 +1,107 @@
+import threading
+import time
+import numpy as np
+import pytest
+
+from ensemble import Ensemble, EnsembleMember, BundleRouter
+
+class StubModel:
+    """
+    returns a fixed approval probability per row; X holds row numbers
+    """
+    def __init__(self, probabilities):
+        self.probabilities = np.asarray(probabilities)
+        self.rows_seen = []
+
+    def predict_proba(self, X):
+        rows = X[:, 0].astype(int)
+        self.rows_seen.extend(rows.tolist())
+        prob = self.probabilities[rows]
+        return np.column_stack([1 - prob, prob])
+
+class TrustSecondMember:
+    def predict_proba(self, features):
+        return np.column_stack([1 - features[:, 1], features[:, 1]])
+
+ROWS = np.arange(3).reshape(-1, 1)
+
+def make_members(weight_a=1.0, short_circuit=None):
+    return [
+        EnsembleMember('a', StubModel([0.9, 0.2, 0.7]), weight=weight_a, short_circuit=short_circuit),
+        EnsembleMember('b', StubModel([0.5, 0.4, 0.2]))
+    ]
+
+def test_soft_voting_averages_probabilities():
+    results = Ensemble(make_members()).predict(ROWS)
+    assert [r['prediction'] for r in results] == [1, 0, 0]
+    assert [r['probability'] for r in results] == pytest.approx([0.7, 0.3, 0.45])
+    assert results[0]['votes'] == {'a': {'prediction': 1, 'probability': 0.9},
+                                   'b': {'prediction': 0, 'probability': 0.5}}
+
+def test_soft_voting_weights():
+    results = Ensemble(make_members(weight_a=3.0)).predict(ROWS)
+    assert [r['prediction'] for r in results] == [1, 0, 1]
+    assert results[2]['probability'] == pytest.approx(0.575)
+
+def test_hard_voting_counts_weighted_votes():
+    assert [r['prediction'] for r in Ensemble(make_members(), voting='hard').predict(ROWS)] == [0, 0, 0]
+    weighted = Ensemble(make_members(weight_a=3.0), voting='hard').predict(ROWS)
+    assert [r['prediction'] for r in weighted] == [1, 0, 1]
+
+def test_stacked_voting_uses_meta_model():
+    ensemble = Ensemble(make_members(), voting='stacked', meta_model=TrustSecondMember())
+    results = ensemble.predict(ROWS)
+    assert [r['probability'] for r in results] == pytest.approx([0.5, 0.4, 0.2])
+    assert [r['prediction'] for r in results] == [0, 0, 0]
+
+def test_stacked_voting_with_subset_falls_back_to_average():
+    ensemble = Ensemble(make_members(), voting='stacked', meta_model=TrustSecondMember())
+    results = ensemble.predict(ROWS, only=['a'])
+    assert [r['probability'] for r in results] == pytest.approx([0.9, 0.2, 0.7])
+    assert all(r['votes']['b'] is None for r in results)
+
+def test_only_restricts_members():
+    members = make_members()
+    results = Ensemble(members).predict(ROWS, only=['b'])
+    assert [r['prediction'] for r in results] == [0, 0, 0]
+    assert members[0].model.rows_seen == []
+    with pytest.raises(ValueError):
+        Ensemble(members).predict(ROWS, only=['missing'])
+
+def test_short_circuit_skips_later_members():
+    members = make_members(short_circuit=0.85)
+    results = Ensemble(members).predict(ROWS)
+    assert members[1].model.rows_seen == [1, 2]
+    assert results[0]['short_circuited'] and results[0]['votes']['b'] is None
+    assert results[0]['probability'] == pytest.approx(0.9)
+    assert not results[1]['short_circuited']
+    assert results[1]['probability'] == pytest.approx(0.3)
+
+def test_short_circuit_rows_skip_the_stacker():
+    ensemble = Ensemble(make_members(short_circuit=0.85), voting='stacked', meta_model=TrustSecondMember())
+    results = ensemble.predict(ROWS)
+    assert [r['probability'] for r in results] == pytest.approx([0.9, 0.4, 0.2])
+
+def test_router_splits_traffic_by_percentage():
+    router = BundleRouter('unused', {'v1': 90, 'v2': 10}, loader=lambda model_dir, version: version)
+    choices = [router.choose(f'client-{i}') for i in range(20000)]
+    assert choices.count('v2') / len(choices) == pytest.approx(0.1, abs=0.02)
+    assert all(router.choose('client-7') == choices[7] for _ in range(10))
+
+def test_router_loads_each_version_once_under_concurrency():
+    calls = []
+
+    def slow_loader(model_dir, version):
+        calls.append(version)
+        time.sleep(0.05)
+        return object()
+
+    router = BundleRouter('unused', {'v1': 100}, loader=slow_loader)
+    bundles = []
+    threads = [threading.Thread(target=lambda: bundles.append(router.get('v1'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == ['v1']
+    assert all(bundle is bundles[0] for bundle in bundles)
@@ -0,0 +1,46 @@
+import json
+import numpy as np
+import pytest
+from bank_app.app import create_app
+from ensemble import load_bundle
+from explain import TreeExplainer, feature_names
+
+def test_tree_contributions_add_up_to_leaf_probability(trained_model_dir, sample_applications):
+    bundle = load_bundle(str(trained_model_dir))
+    tree = bundle.member('dt')
+    X = bundle.preprocessor.transform(sample_applications)
+
+    bias, contributions, leaf_probability, leaves = \
+        TreeExplainer(tree, len(feature_names(bundle.preprocessor))).explain(X)
+    np.testing.assert_array_equal(leaves, tree.apply(X))
+    np.testing.assert_allclose(bias + contributions.sum(axis=1), leaf_probability)
+    np.testing.assert_allclose(leaf_probability, tree.predict_proba(X)[:, 1])
+
+@pytest.fixture
+def client(trained_model_dir):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'LOAN_MODEL_DIR': str(trained_model_dir),
+        'LOAN_AUDIT_ENABLED': False
+    })
+    return app.test_client()
+
+def test_explain_api(client, sample_applications):
+    applications = json.loads(sample_applications.head(3).to_json(orient='records'))
+
+    single = client.post('/loan/api/explain', json=applications[0])
+    assert single.status_code == 200
+    body = single.get_json()
+    assert set(body['explanations']) == {'dt', 'knn'}
+    path = body['explanations']['dt']
+    assert path['bias'] + sum(path['contributions'].values()) == pytest.approx(path['probability'], abs=1e-3)
+    assert len(body['explanations']['knn']['neighbors']) == 3
+
+    batch = client.post('/loan/api/explain', json=applications)
+    assert batch.status_code == 200
+    assert len(batch.get_json()) == 3
+    assert batch.get_json()[0] == body
+
+    invalid = client.post('/loan/api/explain', json=[applications[0], {'income': 1}])
+    assert invalid.status_code == 400
@@ -0,0 +1,263 @@
+import json
+import pytest
+from bank_app.app import create_app
+from bank_app.admission import MemoryRateLimitBackend, AdaptiveConcurrencyLimiter
+
+@pytest.fixture
+def client(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'LOAN_MODEL_DIR': str(tmp_path)
+    })
+    return app.test_client()
+
+def valid_application():
+    return {
+        'income': 70000,
+        'credit_score': 720,
+        'loan_amount': 20000,
+        'loan_term': 48,
+        'employment_status': 'employed'
+    }
+
+def test_predict_api_missing_field(client):
+    data = valid_application()
+    del data['income']
+    response = client.post('/loan/api/predict', data=json.dumps(data), content_type='application/json')
+    assert response.status_code == 400
+    assert json.loads(response.data)['error'] == 'Missing required field: income'
+
+def test_predict_api_rejects_unknown_employment_status(client):
+    data = valid_application()
+    data['employment_status'] = 'retired'
+    response = client.post('/loan/api/predict', data=json.dumps(data), content_type='application/json')
+    assert response.status_code == 400
+    errors = json.loads(response.data)['errors']
+    assert errors[0]['field'] == 'employment_status'
+
+def test_predict_api_batch_reports_every_bad_row(client):
+    bad_score = valid_application()
+    bad_score['credit_score'] = 2000
+    bad_income = valid_application()
+    bad_income['income'] = 'lots'
+    response = client.post('/loan/api/predict',
+                           data=json.dumps([valid_application(), bad_score, bad_income]),
+                           content_type='application/json')
+    assert response.status_code == 400
+    errors = json.loads(response.data)['errors']
+    assert [(error['index'], error['field']) for error in errors] == [(1, 'credit_score'), (2, 'income')]
+
+def test_predict_api_without_models(client):
+    response = client.post('/loan/api/predict', data=json.dumps(valid_application()),
+                           content_type='application/json')
+    assert response.status_code == 500
+    assert 'Models not found' in json.loads(response.data)['error']
+
+def test_predict_api_rate_limited(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'LOAN_MODEL_DIR': str(tmp_path),
+        'LOAN_RATE_LIMIT': 0.01,
+        'LOAN_RATE_BURST': 2
+    })
+    client = app.test_client()
+    greedy = {'REMOTE_ADDR': '10.0.0.1'}
+    for _ in range(2):
+        response = client.post('/loan/api/predict', json=valid_application(), environ_base=greedy)
+        assert response.status_code == 500
+    response = client.post('/loan/api/predict', json=valid_application(), environ_base=greedy,
+                           headers={'X-Client-Id': 'fresh-id'})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    response = client.post('/loan/api/predict', json=valid_application(), environ_base={'REMOTE_ADDR': '10.0.0.2'})
+    assert response.status_code == 500
+    response = client.post('/loan/api/explain', json=valid_application(), environ_base=greedy)
+    assert response.status_code == 429
+
+def test_predict_api_charges_one_token_per_application(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'LOAN_MODEL_DIR': str(tmp_path),
+        'LOAN_RATE_LIMIT': 0.01,
+        'LOAN_RATE_BURST': 5
+    })
+    client = app.test_client()
+    assert client.post('/loan/api/predict', json=[valid_application()] * 6).status_code == 413
+    assert client.post('/loan/api/predict', json=[valid_application()] * 3).status_code == 500
+    assert client.post('/loan/api/predict', json=[valid_application()] * 3).status_code == 429
+
+def test_rate_limit_key_is_configurable(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'LOAN_MODEL_DIR': str(tmp_path),
+        'LOAN_RATE_LIMIT': 0.01,
+        'LOAN_RATE_BURST': 1,
+        'LOAN_RATE_LIMIT_KEY': lambda req: req.headers.get('X-Forwarded-For')
+    })
+    client = app.test_client()
+    for client_ip in ('1.1.1.1', '2.2.2.2'):
+        response = client.post('/loan/api/predict', json=valid_application(), headers={'X-Forwarded-For': client_ip})
+        assert response.status_code == 500
+    response = client.post('/loan/api/predict', json=valid_application(), headers={'X-Forwarded-For': '1.1.1.1'})
+    assert response.status_code == 429
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryRateLimitBackend(max_keys=2)
+    backend.take('a', 0.01, 1)
+    backend.take('b', 0.01, 1)
+    assert backend.take('a', 0.01, 1)[0] is False
+    backend.take('c', 0.01, 1)
+    assert list(backend._buckets) == ['a', 'c']
+
+def test_limiter_scales_latency_by_cost():
+    limiter = AdaptiveConcurrencyLimiter()
+    limiter.acquire()
+    limiter.release(0.5, cost=100)
+    assert limiter.latency == pytest.approx(0.005)
+
+def test_rejected_requests_do_not_train_the_limiter(trained_model_dir):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'LOAN_MODEL_DIR': str(trained_model_dir),
+        'LOAN_AUDIT_ENABLED': False
+    })
+    client = app.test_client()
+    limiter = app.extensions['admission']['limiter']
+    for _ in range(3):
+        assert client.post('/loan/api/predict', json={}).status_code == 400
+    assert limiter.latency is None
+    assert client.post('/loan/api/predict', json=valid_application()).status_code == 200
+    assert limiter.latency is not None
+
+def test_predict_api_degraded_mode_uses_tree_only(trained_model_dir):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'LOAN_MODEL_DIR': str(trained_model_dir),
+        'LOAN_AUDIT_ENABLED': False,
+        'LOAN_CONCURRENCY_LIMIT': 2,
+        'LOAN_CONCURRENCY_MIN': 2,
+        'LOAN_DEGRADE_QUEUE': 1
+    })
+    limiter = app.extensions['admission']['limiter']
+    limiter.acquire()
+    limiter.acquire()
+    response = app.test_client().post('/loan/api/predict', json=[valid_application()] * 2)
+    assert response.status_code == 200
+    for prediction in response.get_json():
+        assert prediction['degraded'] is True
+        assert prediction['knn_prediction'] == 'Skipped'
+        assert prediction['votes']['dt'] is not None
+        assert prediction['votes']['knn'] is None
+    response = app.test_client().post('/loan/api/explain', json=valid_application())
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert limiter.in_flight == 2
+
+def test_predict_api_sheds_load_when_saturated(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'LOAN_MODEL_DIR': str(tmp_path),
+        'LOAN_CONCURRENCY_LIMIT': 2,
+        'LOAN_CONCURRENCY_MIN': 2,
+        'LOAN_DEGRADE_QUEUE': 1
+    })
+    limiter = app.extensions['admission']['limiter']
+    assert [limiter.acquire() for _ in range(3)] == ['full', 'full', 'degraded']
+    response = app.test_client().post('/loan/api/predict', json=valid_application())
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    for _ in range(3):
+        limiter.release()
+    assert limiter.in_flight == 0
+
+def test_health_endpoints_without_models(client):
+    assert client.get('/healthz').status_code == 200
+    response = client.get('/readyz')
+    assert response.status_code == 503
+    body = response.get_json()
+    assert body['status'] == 'failed'
+    assert 'not found' in body['error']
+    assert body['database'] == 'ok'
+
+def test_readyz_retries_warmup_once_models_exist(tmp_path, trained_model_dir):
+    import shutil
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'LOAN_MODEL_DIR': str(tmp_path),
+        'LOAN_AUDIT_ENABLED': False,
+        'LOAN_WARMUP_RETRY_DELAY': 0
+    })
+    client = app.test_client()
+    assert client.get('/readyz').status_code == 503
+
+    for model_file in trained_model_dir.iterdir():
+        shutil.copy(model_file, tmp_path)
+    response = client.get('/readyz')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['status'] == 'ready'
+    assert body['attempts'] == 3
+    assert 'predict_ms' in body['versions']['default']
+
+def test_readyz_backs_off_between_warmup_retries(client):
+    for _ in range(3):
+        assert client.get('/readyz').status_code == 503
+    assert client.get('/readyz').get_json()['attempts'] == 1
+
+def test_readyz_when_warmup_disabled(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'LOAN_MODEL_DIR': str(tmp_path),
+        'LOAN_WARMUP': False
+    })
+    response = app.test_client().get('/readyz')
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'skipped'
+
+def test_predict_api_rejects_boolean_numbers(client):
+    data = valid_application()
+    data['income'] = True
+    response = client.post('/loan/api/predict', json=data)
+    assert response.status_code == 400
+    assert response.get_json()['errors'] == [{'index': 0, 'field': 'income', 'error': 'income must be a number'}]
+
+def test_routing_key_ignores_remote_address(client):
+    from bank_app.api.loan_routes import routing_key
+    app = client.application
+    with app.test_request_context('/loan/api/predict', environ_base={'REMOTE_ADDR': '10.0.0.1'}):
+        assert routing_key() is None
+    with app.test_request_context('/loan/api/predict', headers={'X-Client-Id': 'client-7'}):
+        assert routing_key() == 'client-7'
+
+@pytest.mark.parametrize('value', [[1, 2], [[5]], {'amount': 5}])
+def test_predict_api_rejects_non_scalar_numbers(client, value):
+    data = valid_application()
+    data['income'] = value
+    response = client.post('/loan/api/predict', data=json.dumps(data), content_type='application/json')
+    assert response.status_code == 400
+    assert response.get_json()['errors'] == [{'index': 0, 'field': 'income', 'error': 'income must be a number'}]
+
+def test_schema_batch_with_mixed_shapes():
+    from schema import LOAN_APPLICATION, ValidationError
+    good = valid_application()
+    bad = dict(valid_application(), credit_score=[700])
+    with pytest.raises(ValidationError) as error:
+        LOAN_APPLICATION.validate_batch([good, bad, good])
+    assert [(e['index'], e['field']) for e in error.value.errors] == [(1, 'credit_score')]
+    with pytest.raises(ValidationError) as error:
+        LOAN_APPLICATION.validate(dict(valid_application(), loan_term=10 ** 400))
+    assert error.value.errors[0]['field'] == 'loan_term'
+
+def test_predict_api_huge_integer_is_a_client_error(client):
+    body = json.dumps(valid_application()).replace('70000', '1' + '0' * 400)
+    response = client.post('/loan/api/predict', data=body, content_type='application/json')
+    assert response.status_code == 400
@@ -0,0 +1,54 @@
+import numpy as np
+from ensemble import load_bundle
+from model_store import SharedKNN, SharedTree, attach_store, export_store
+
+def test_shared_store_matches_sklearn(trained_model_dir, sample_applications, tmp_path):
+    bundle = load_bundle(str(trained_model_dir))
+    export_store(bundle, str(tmp_path / 'default'))
+    shared = attach_store(str(tmp_path))
+    X = bundle.preprocessor.transform(sample_applications)
+
+    tree, shared_tree = bundle.member('dt'), shared.member('dt')
+    assert isinstance(shared_tree, SharedTree)
+    np.testing.assert_array_equal(shared_tree.apply(X), tree.apply(X))
+    np.testing.assert_allclose(shared_tree.predict_proba(X), tree.predict_proba(X))
+
+    knn, shared_knn = bundle.member('knn'), shared.member('knn')
+    assert isinstance(shared_knn, SharedKNN)
+    distances, indices = knn.kneighbors(X)
+    shared_distances, shared_indices = shared_knn.kneighbors(X)
+    np.testing.assert_array_equal(shared_indices, indices)
+    np.testing.assert_allclose(shared_distances, distances, atol=1e-9)
+    np.testing.assert_allclose(shared_knn.predict_proba(X), knn.predict_proba(X))
+
+    assert [r['probability'] for r in shared.ensemble.predict(X)] == \
+        [r['probability'] for r in bundle.ensemble.predict(X)]
+
+def test_store_keeps_ab_routing(trained_model_dir, tmp_path):
+    import json
+    import shutil
+    from ensemble import BundleRouter
+    from model_store import prepare_store
+
+    model_dir = tmp_path / 'models'
+    shutil.copytree(trained_model_dir, model_dir)
+    shutil.copytree(trained_model_dir, model_dir / 'v2')
+    (model_dir / 'routing.json').write_text(json.dumps({'default': 70, 'v2': 30}))
+
+    store = tmp_path / 'store'
+    prepare_store(str(model_dir), str(store))
+    router = BundleRouter(str(store), loader=attach_store)
+    assert router.routes == {'default': 70, 'v2': 30}
+    assert router.route('client-1').version in ('default', 'v2')
+    assert {router.choose(f'client-{i}') for i in range(100)} == {'default', 'v2'}
+
+def test_shared_knn_chunks_large_batches(trained_model_dir, sample_applications, tmp_path):
+    bundle = load_bundle(str(trained_model_dir))
+    export_store(bundle, str(tmp_path / 'default'))
+    shared_knn = attach_store(str(tmp_path)).member('knn')
+    shared_knn.chunk_size = 4
+    X = bundle.preprocessor.transform(sample_applications)
+    distances, indices = bundle.member('knn').kneighbors(X)
+    shared_distances, shared_indices = shared_knn.kneighbors(X)
+    np.testing.assert_array_equal(shared_indices, indices)
+    np.testing.assert_allclose(shared_distances, distances, atol=1e-9)
@@ -133,3 +133,194 @@ def test_delete_bank_api(client, app):
     data = json.loads(response.data)
     assert len(data) == 1
     assert data[0]['name'] == 'Test Bank 2'
+
+def test_index_page_reflects_api_update(client, app):
+    with app.app_context():
+        bank = Bank.query.filter_by(name='Test Bank 1').first()
+    assert b'Test Bank 1' in client.get('/').data
+    assert b'Test Bank 1' in client.get(f'/bank/{bank.id}').data
+
+    client.put(f'/api/banks/{bank.id}',
+               data=json.dumps({'name': 'Renamed Bank'}),
+               content_type='application/json')
+
+    assert b'Renamed Bank' in client.get('/').data
+    assert b'Renamed Bank' in client.get(f'/bank/{bank.id}').data
+
+def test_bank_pages_served_from_fragment_cache(client, app):
+    client.get('/')
+    client.get('/')
+    cache = app.extensions['fragment_cache']
+    assert cache.hits >= 1
+
+@pytest.fixture
+def group_commit_app(app):
+    from bank_app.db.writer import GroupCommitWriter
+    writer = GroupCommitWriter(app, window=0.05)
+    app.extensions['bank_writer'] = writer
+    yield app
+    writer.stop(timeout=5)
+    del app.extensions['bank_writer']
+
+def test_group_commit_merges_concurrent_creates(group_commit_app):
+    from concurrent.futures import ThreadPoolExecutor
+
+    def create(i):
+        client = group_commit_app.test_client()
+        return client.post('/api/banks',
+                           data=json.dumps({'name': f'Batch Bank {i}', 'location': 'Batch Location'}),
+                           content_type='application/json')
+
+    before = len(json.loads(group_commit_app.test_client().get('/api/banks').data))
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(create, range(8)))
+
+    assert all(response.status_code == 201 for response in responses)
+    ids = {json.loads(response.data)['id'] for response in responses}
+    assert len(ids) == 8
+
+    writer = group_commit_app.extensions['bank_writer']
+    assert writer.operations == 8
+    assert writer.batches < 8
+
+    data = json.loads(group_commit_app.test_client().get('/api/banks').data)
+    assert len(data) == before + 8
+
+def test_group_commit_update_missing_bank(group_commit_app):
+    client = group_commit_app.test_client()
+    response = client.put('/api/banks/9999',
+                          data=json.dumps({'name': 'Nobody'}),
+                          content_type='application/json')
+    assert response.status_code == 404
+
+def test_group_commit_timeout_cancels_queued_write(group_commit_app):
+    import threading
+    import time
+    from bank_app.db.writer import run_write, create_bank_record
+
+    writer = group_commit_app.extensions['bank_writer']
+    release = threading.Event()
+    blocker = writer.submit(lambda session: release.wait(5))
+    time.sleep(0.2)
+
+    group_commit_app.config['BANK_GROUP_COMMIT_TIMEOUT'] = 0.05
+    with group_commit_app.app_context():
+        with pytest.raises(TimeoutError):
+            run_write(create_bank_record, 'Late Bank', 'Nowhere')
+    release.set()
+    blocker.result(5)
+    writer.submit(lambda session: None).result(5)
+
+    assert writer.operations == 2
+    names = [bank['name'] for bank in group_commit_app.test_client().get('/api/banks').get_json()]
+    assert 'Late Bank' not in names
+
+def test_get_banks_api_gzip(client, app):
+    import gzip
+    app.config['COMPRESS_MIN_SIZE'] = 1
+    response = client.get('/api/banks', headers={'Accept-Encoding': 'gzip, deflate;q=0.5'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    data = json.loads(gzip.decompress(response.data))
+    assert [bank['name'] for bank in data] == ['Test Bank 1', 'Test Bank 2']
+
+def test_choose_encoding_respects_refusals():
+    from bank_app.compression import choose_encoding
+    assert choose_encoding('gzip;q=0') is None
+    assert choose_encoding('gzip;q=0, deflate') == 'deflate'
+    assert choose_encoding('deflate;q=0.5, gzip;q=0.5') == 'gzip'
+
+def test_gzip_refused_response_not_compressed(client, app):
+    app.config['COMPRESS_MIN_SIZE'] = 1
+    response = client.get('/api/banks', headers={'Accept-Encoding': 'gzip;q=0'})
+    assert 'Content-Encoding' not in response.headers
+    assert len(json.loads(response.data)) == 2
+
+def test_small_response_not_compressed(client):
+    response = client.get('/api/banks', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert len(json.loads(response.data)) == 2
+
+def test_profiler_admin_requires_token(client):
+    assert client.get('/admin/profiler').status_code == 404
+
+def test_profiler_samples_bank_listing(client, app):
+    app.config['ADMIN_TOKEN'] = 'secret'
+    headers = {'X-Admin-Token': 'secret'}
+    assert client.get('/admin/profiler').status_code == 403
+
+    response = client.post('/admin/profiler', headers=headers,
+                           data=json.dumps({'enabled': True, 'sample_rate': 1.0, 'mode': 'cprofile'}),
+                           content_type='application/json')
+    assert json.loads(response.data)['enabled'] is True
+
+    client.get('/api/banks')
+    client.post('/admin/profiler', headers=headers,
+                data=json.dumps({'enabled': False}), content_type='application/json')
+
+    status = json.loads(client.get('/admin/profiler', headers=headers).data)
+    assert 'GET /api/banks' in status['routes']
+    report = client.get('/admin/profiler/cprofile', headers=headers).data
+    assert b'GET /api/banks' in report
+
+def test_profiler_sample_mode_collapses_stacks():
+    import time
+    from bank_app.profiler import RequestProfiler
+
+    def busy(seconds):
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            pass
+
+    profiler = RequestProfiler(sample_rate=1.0, interval=0.001, mode='sample')
+    profiler.enable()
+    try:
+        profiler.start_request('POST /loan/api/predict')
+        with profiler.stage('transform'):
+            busy(0.2)
+        profiler.end_request()
+    finally:
+        profiler.disable()
+
+    lines = profiler.collapsed().splitlines()
+    assert lines
+    assert all(line.startswith('POST /loan/api/predict;stage:') for line in lines)
+    assert any(';stage:transform;' in line and 'busy (test_routes.py' in line for line in lines)
+    assert profiler.status()['routes']['POST /loan/api/predict'] == sum(int(line.rsplit(' ', 1)[1]) for line in lines)
+
+def test_fragment_cache_sees_writes_from_other_workers(tmp_path):
+    config = {
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'shared.db'}",
+        'LOAN_WARMUP': False,
+        'LOAN_AUDIT_ENABLED': False
+    }
+    worker_1 = create_app(config).test_client()
+    worker_2 = create_app(config).test_client()
+
+    bank = worker_1.post('/api/banks', json={'name': 'Shared Bank', 'location': 'Shared Location'}).get_json()
+    for path in ('/', f"/bank/{bank['id']}"):
+        worker_2.get(path)
+        assert b'Shared Bank' in worker_2.get(path).data
+
+    worker_1.put(f"/api/banks/{bank['id']}", json={'name': 'Renamed Shared Bank'})
+    assert b'Renamed Shared Bank' in worker_2.get('/').data
+    assert b'Renamed Shared Bank' in worker_2.get(f"/bank/{bank['id']}").data
+
+    worker_1.delete(f"/api/banks/{bank['id']}")
+    assert b'Shared Bank' not in worker_2.get('/').data
+    assert worker_2.get(f"/bank/{bank['id']}").status_code == 404
+
+def test_bank_versions_stay_bounded(client, app):
+    from bank_app.db.models import BankVersion, GLOBAL_VERSION
+    bank = client.post('/api/banks', json={'name': 'Busy Bank', 'location': 'Busy Location'}).get_json()
+    for i in range(5):
+        client.put(f"/api/banks/{bank['id']}", json={'name': f'Busy Bank {i}'})
+    with app.app_context():
+        versions = dict(db.session.execute(db.select(BankVersion.bank_id, BankVersion.version)).all())
+    assert versions == {GLOBAL_VERSION: 6, bank['id']: 6}
+
+    client.delete(f"/api/banks/{bank['id']}")
+    with app.app_context():
+        versions = dict(db.session.execute(db.select(BankVersion.bank_id, BankVersion.version)).all())
+    assert versions == {GLOBAL_VERSION: 7}
@@ -0,0 +1,175 @@
+import math
+import threading
+import time
+from flask import Blueprint, current_app, jsonify
+from sqlalchemy import text
+from bank_app.db.models import db
+from bank_app.api.loan_routes import get_router, load_models, prediction_payload, DEGRADED_MEMBERS, LOAN_APPLICATION
+
+health_bp = Blueprint('health', __name__)
+
+SYNTHETIC_APPLICATIONS = [
+    {'income': 72000, 'credit_score': 740, 'loan_amount': 18000, 'loan_term': 36, 'employment_status': 'employed'},
+    {'income': 41000, 'credit_score': 610, 'loan_amount': 25000, 'loan_term': 60, 'employment_status': 'self-employed'},
+    {'income': 15000, 'credit_score': 480, 'loan_amount': 30000, 'loan_term': 120, 'employment_status': 'unemployed'},
+    {'income': 98000, 'credit_score': 805, 'loan_amount': 5000, 'loan_term': 12, 'employment_status': 'employed'}
+]
+
+class WarmupState:
+    """
+    outcome and timings of the startup warm-up, read by /readyz
+
+    status is 'pending', 'ready', 'failed' or 'skipped' (warm-up disabled,
+    models are then loaded on first use as before). A failed warm-up is
+    retried from /readyz, waiting retry_delay seconds after the first
+    failure and doubling up to max_retry_delay, so a worker started before
+    its models were trained becomes ready once they appear.
+    """
+    def __init__(self, retry_delay=5.0, max_retry_delay=300.0):
+        self.status = 'pending'
+        self.error = None
+        self.versions = {}
+        self.duration_ms = None
+        self.attempts = 0
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.next_attempt = 0.0
+        self.lock = threading.Lock()
+
+    def failed(self, error):
+        self.status = 'failed'
+        self.error = error
+        delay = min(self.retry_delay * 2 ** (self.attempts - 1), self.max_retry_delay)
+        self.next_attempt = time.monotonic() + delay
+
+    def retry_due(self):
+        return self.status == 'failed' and time.monotonic() >= self.next_attempt
+
+    @property
+    def ready(self):
+        return self.status in ('ready', 'skipped')
+
+    def to_dict(self):
+        return {
+            'status': self.status,
+            'error': self.error,
+            'duration_ms': self.duration_ms,
+            'attempts': self.attempts,
+            'versions': self.versions
+        }
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 3)
+
+def check_results(results, n_rows):
+    """
+    sanity checks on the scores of the synthetic applications
+    """
+    if len(results) != n_rows:
+        raise ValueError(f"Expected {n_rows} results, got {len(results)}")
+    for result in results:
+        probability = result['probability']
+        if not math.isfinite(probability) or not 0.0 <= probability <= 1.0:
+            raise ValueError(f"Invalid probability {probability}")
+        if not any(vote is not None for vote in result['votes'].values()):
+            raise ValueError("No ensemble member voted")
+
+def warm_version(version, rounds):
+    """
+    load one bundle version and run the synthetic applications through
+    validation, scoring, degraded scoring and response encoding
+    """
+    started = time.perf_counter()
+    bundle = load_models(version)
+    if bundle is None:
+        raise FileNotFoundError(f"Model bundle '{version}' not found. Please train the models first.")
+    timings = {'load_ms': _elapsed_ms(started)}
+
+    predict_ms = []
+    for _ in range(max(rounds, 1)):
+        started = time.perf_counter()
+        input_df = LOAN_APPLICATION.validate_batch(SYNTHETIC_APPLICATIONS)
+        results = bundle.predict(input_df)
+        check_results(results, len(SYNTHETIC_APPLICATIONS))
+        current_app.json.dumps([prediction_payload(result, bundle) for result in results])
+        predict_ms.append(_elapsed_ms(started))
+    timings['first_predict_ms'] = predict_ms[0]
+    timings['predict_ms'] = sorted(predict_ms)[len(predict_ms) // 2]
+
+    only = current_app.config.get('LOAN_DEGRADED_MEMBERS', DEGRADED_MEMBERS)
+    if any(bundle.member(name) is not None for name in only):
+        started = time.perf_counter()
+        check_results(bundle.predict(input_df, only=only), len(SYNTHETIC_APPLICATIONS))
+        timings['degraded_predict_ms'] = _elapsed_ms(started)
+    return timings
+
+def warm_up(app):
+    """
+    load and validate every routed model version before serving traffic
+    """
+    state = app.extensions['loan_warmup']
+    state.attempts += 1
+    started = time.perf_counter()
+    with app.app_context():
+        try:
+            versions = {}
+            for version in get_router().routes:
+                versions[version] = warm_version(version, app.config.get('LOAN_WARMUP_ROUNDS', 3))
+            state.versions = versions
+            state.status = 'ready'
+            state.error = None
+        except Exception as e:
+            state.failed(str(e))
+            app.logger.warning('Loan model warm-up failed (attempt %d): %s', state.attempts, e)
+    state.duration_ms = _elapsed_ms(started)
+    if state.status == 'ready':
+        app.logger.info('Loan models warm in %.1f ms: %s', state.duration_ms, state.versions)
+    return state
+
+def database_ready():
+    try:
+        db.session.execute(text('SELECT 1'))
+        return True
+    except Exception:
+        current_app.logger.exception('Database readiness check failed')
+        return False
+
+@health_bp.route('/healthz')
+def healthz():
+    """
+    liveness, the process is up and serving requests
+    """
+    return jsonify({'status': 'ok'})
+
+@health_bp.route('/readyz')
+def readyz():
+    """
+    readiness, models are warm and the database answers
+
+    a failed warm-up is retried here once its backoff has passed; probes
+    arriving while a retry runs report the previous state
+    """
+    state = current_app.extensions['loan_warmup']
+    if state.retry_due() and state.lock.acquire(blocking=False):
+        try:
+            warm_up(current_app._get_current_object())
+        finally:
+            state.lock.release()
+    database = database_ready()
+    body = state.to_dict()
+    body['database'] = 'ok' if database else 'unavailable'
+    return jsonify(body), 200 if state.ready and database else 503
+
+def init_app(app):
+    """
+    register the health endpoints and warm the loan models unless LOAN_WARMUP is false
+    """
+    app.extensions['loan_warmup'] = WarmupState(
+        retry_delay=app.config.get('LOAN_WARMUP_RETRY_DELAY', 5.0),
+        max_retry_delay=app.config.get('LOAN_WARMUP_MAX_RETRY_DELAY', 300.0)
+    )
+    app.register_blueprint(health_bp)
+    if app.config.get('LOAN_WARMUP', True):
+        warm_up(app)
+    else:
+        app.extensions['loan_warmup'].status = 'skipped'
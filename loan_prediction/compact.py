@@ -0,0 +1,205 @@
+import numpy as np
+
+UNKNOWN_CODE = 255
+STORAGE_TYPES = ('float32', 'int16')
+
+class CompactKNN:
+    """
+    KNN over a compact copy of the training matrix
+
+    the numeric features are stored as one contiguous float32 (or scaled
+    int16) block and the one-hot employment_status columns as a single uint8
+    category code. Queries still arrive as the preprocessor's full matrix.
+    """
+    block_size = 4096
+
+    def __init__(self, numeric, scale, codes, y, classes, n_categories,
+                 n_neighbors, weights, metric, p, chunk_size=256, block_size=4096):
+        self.numeric = numeric
+        self.scale = scale
+        self.codes = codes
+        self._y = y
+        self.classes_ = classes
+        self.n_categories = n_categories
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+        self.metric = metric
+        self.p = p
+        self.chunk_size = chunk_size
+        self.block_size = block_size
+        self.n_numeric = numeric.shape[1]
+        if metric == 'euclidean':
+            values = self._dequantize(numeric)
+            self._sq_norms = (values * values).sum(axis=1)
+        else:
+            self._sq_norms = None
+
+    @property
+    def storage(self):
+        return self.numeric.dtype.name
+
+    @property
+    def nbytes(self):
+        """
+        bytes held in every stored array, including the cached row norms
+        """
+        arrays = (self.numeric, self.codes, self._y, self.scale, self._sq_norms)
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    def _dequantize(self, block):
+        if self.scale is None:
+            return block
+        return block.astype(np.float32) * self.scale
+
+    def _dot_training(self, numeric):
+        """
+        numeric . training rows^T without a float copy of the whole block
+
+        int16 rows are converted a block_size slice at a time into one reused
+        float32 buffer, and the per-column scale is folded into the queries
+        """
+        if self.scale is None:
+            return numeric.dot(self.numeric.T)
+        scaled = numeric * self.scale
+        n_train = self.numeric.shape[0]
+        out = np.empty((numeric.shape[0], n_train), dtype=np.float32)
+        buffer = np.empty((min(self.block_size, n_train), self.n_numeric), dtype=np.float32)
+        for start in range(0, n_train, self.block_size):
+            block = self.numeric[start:start + self.block_size]
+            converted = buffer[:block.shape[0]]
+            converted[...] = block
+            out[:, start:start + block.shape[0]] = scaled.dot(converted.T)
+        return out
+
+    def _split(self, X):
+        if hasattr(X, 'toarray'):
+            X = X.toarray()
+        X = np.asarray(X)
+        numeric = np.ascontiguousarray(X[:, :self.n_numeric], dtype=np.float32)
+        return numeric, encode_categories(X[:, self.n_numeric:])
+
+    def _mismatch(self, codes, start=0, stop=None):
+        """
+        category term between a chunk of queries and training rows start:stop
+
+        a differing category flips two one-hot bits (one if either side is
+        unknown), each adding 1 to the summed |difference|^p
+        """
+        train = self.codes[start:stop]
+        known = (codes < self.n_categories).astype(np.float32)
+        train_known = (train < self.n_categories).astype(np.float32)
+        return (codes[:, None] != train[None, :]) * (known[:, None] + train_known[None, :])
+
+    def _distances(self, numeric, codes):
+        """
+        distances from a chunk of queries to every training row
+
+        manhattan and minkowski differences are taken a block_size slice of
+        training rows at a time, so the (queries, rows, features) temporary
+        stays bounded
+        """
+        if self.metric == 'euclidean':
+            sq = ((numeric * numeric).sum(axis=1)[:, None]
+                  - 2 * self._dot_training(numeric)
+                  + self._sq_norms[None, :])
+            return np.sqrt(np.maximum(sq + self._mismatch(codes), 0))
+        if self.scale is not None:
+            numeric = np.round(numeric / self.scale).astype(np.int32)
+        n_train = self.numeric.shape[0]
+        out = np.empty((numeric.shape[0], n_train), dtype=np.float32)
+        for start in range(0, n_train, self.block_size):
+            stop = start + self.block_size
+            diff = np.abs(numeric[:, None, :] - self.numeric[None, start:stop, :])
+            if self.scale is not None:
+                diff = diff * self.scale
+            if self.metric == 'manhattan':
+                out[:, start:stop] = diff.sum(axis=2)
+            else:
+                out[:, start:stop] = (diff ** self.p).sum(axis=2)
+            out[:, start:stop] += self._mismatch(codes, start, stop)
+        if self.metric == 'manhattan':
+            return out
+        return out ** (1.0 / self.p)
+
+    def kneighbors(self, X, n_neighbors=None, return_distance=True):
+        k = n_neighbors or self.n_neighbors
+        numeric, codes = self._split(X)
+        all_dist = []
+        all_index = []
+        for start in range(0, numeric.shape[0], self.chunk_size):
+            stop = start + self.chunk_size
+            distances = self._distances(numeric[start:stop], codes[start:stop])
+            nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            nearest_dist = np.take_along_axis(distances, nearest, axis=1)
+            order = np.argsort(nearest_dist, axis=1, kind='stable')
+            all_index.append(np.take_along_axis(nearest, order, axis=1))
+            all_dist.append(np.take_along_axis(nearest_dist, order, axis=1))
+        distances = np.vstack(all_dist).astype(np.float64)
+        indices = np.vstack(all_index)
+        if return_distance:
+            return distances, indices
+        return indices
+
+    def predict_proba(self, X):
+        distances, nearest = self.kneighbors(X)
+        if self.weights == 'distance':
+            with np.errstate(divide='ignore'):
+                weights = 1.0 / distances
+            exact = np.isinf(weights)
+            exact_rows = exact.any(axis=1)
+            weights[exact_rows] = exact[exact_rows]
+        else:
+            weights = np.ones_like(distances)
+        labels = self._y[nearest]
+        proba = np.zeros((labels.shape[0], len(self.classes_)))
+        for class_index in range(len(self.classes_)):
+            proba[:, class_index] = (weights * (labels == class_index)).sum(axis=1)
+        return proba / proba.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+def encode_categories(onehot):
+    """
+    uint8 category code for each one-hot row, UNKNOWN_CODE for all zeros
+    """
+    onehot = np.asarray(onehot)
+    codes = np.argmax(onehot, axis=1).astype(np.uint8)
+    codes[onehot.max(axis=1) == 0] = UNKNOWN_CODE
+    return codes
+
+def compact_knn(knn_model, n_numeric=4, storage='float32'):
+    """
+    compact copy of a fitted KNeighborsClassifier
+    """
+    if storage not in STORAGE_TYPES:
+        raise ValueError(f"Unknown storage type: {storage}")
+    if knn_model.weights not in ('uniform', 'distance'):
+        raise ValueError("Only uniform and distance weights can be compacted")
+
+    fit_X = knn_model._fit_X
+    if hasattr(fit_X, 'toarray'):
+        fit_X = fit_X.toarray()
+    numeric = np.asarray(fit_X[:, :n_numeric], dtype=np.float64)
+    onehot = np.asarray(fit_X[:, n_numeric:])
+
+    scale = None
+    if storage == 'int16':
+        scale = (np.abs(numeric).max(axis=0) / np.iinfo(np.int16).max).astype(np.float32)
+        scale[scale == 0] = 1
+        numeric = np.round(numeric / scale).astype(np.int16)
+    else:
+        numeric = numeric.astype(np.float32)
+
+    metric = knn_model.effective_metric_
+    p = knn_model.effective_metric_params_.get('p', knn_model.p)
+    if metric == 'minkowski' and p == 2:
+        metric = 'euclidean'
+    if metric == 'minkowski' and p == 1:
+        metric = 'manhattan'
+
+    return CompactKNN(
+        np.ascontiguousarray(numeric), scale, encode_categories(onehot),
+        np.asarray(knn_model._y, dtype=np.uint8), knn_model.classes_, onehot.shape[1],
+        knn_model.n_neighbors, knn_model.weights, metric, p
+    )
@@ -0,0 +1,314 @@
+import json
+import os
+import pickle
+import random
+import threading
+import zlib
+from contextlib import nullcontext
+import numpy as np
+
+VOTING_MODES = ('soft', 'hard', 'stacked')
+
+DEFAULT_VERSION = 'default'
+MANIFEST_FILE = 'bundle.json'
+ROUTING_FILE = 'routing.json'
+
+DEFAULT_MANIFEST = {
+    'voting': 'soft',
+    'preprocessor': 'preprocessor.pkl',
+    'members': [
+        {'name': 'dt', 'file': 'decision_tree_model.pkl', 'weight': 1.0},
+        {'name': 'knn', 'file': 'knn_model.pkl', 'weight': 1.0}
+    ]
+}
+
+_stage_hook = None
+
+def set_stage_hook(hook):
+    """
+    install hook(name) returning a context manager around each scoring stage
+    """
+    global _stage_hook
+    _stage_hook = hook
+
+def stage(name):
+    if _stage_hook is None:
+        return nullcontext()
+    return _stage_hook(name)
+
+def label(prediction):
+    """
+    human readable label for a 0/1 prediction
+    """
+    return "Approved" if prediction == 1 else "Rejected"
+
+class EnsembleMember:
+    """
+    a single model taking part in the ensemble vote
+    """
+    def __init__(self, name, model, weight=1.0, short_circuit=None):
+        self.name = name
+        self.model = model
+        self.weight = float(weight)
+        self.short_circuit = short_circuit
+
+    def __repr__(self):
+        return f"<EnsembleMember {self.name} weight={self.weight}>"
+
+    def predict_proba(self, X):
+        """
+        probability of approval for every row of X
+        """
+        return self.model.predict_proba(X)[:, 1]
+
+class Ensemble:
+    """
+    weighted vote over N models, evaluated in member order
+
+    members are evaluated cheapest first; a member with a short_circuit
+    confidence stops evaluation for every row it is at least that sure about
+    """
+    def __init__(self, members, voting='soft', meta_model=None):
+        if not members:
+            raise ValueError("An ensemble needs at least one member")
+        if voting not in VOTING_MODES:
+            raise ValueError(f"Unknown voting mode: {voting}")
+        if voting == 'stacked' and meta_model is None:
+            raise ValueError("Stacked voting requires a meta model")
+        self.members = list(members)
+        self.voting = voting
+        self.meta_model = meta_model
+
+    def member_names(self):
+        return [member.name for member in self.members]
+
+    def predict(self, X, only=None):
+        """
+        score every row of X, returning one result dict per row
+
+        only restricts evaluation to the named members; the others are
+        reported with a None vote, like members skipped by a short circuit
+        """
+        members = self.members
+        if only is not None:
+            members = [member for member in members if member.name in only]
+            if not members:
+                raise ValueError(f"No ensemble members match {list(only)}")
+
+        n_rows = X.shape[0]
+        probabilities = np.full((len(members), n_rows), np.nan)
+        pending = np.ones(n_rows, dtype=bool)
+        decided_by = np.full(n_rows, -1)
+
+        for i, member in enumerate(members):
+            rows = np.flatnonzero(pending)
+            if rows.size == 0:
+                break
+            with stage(f'model:{member.name}'):
+                prob = member.predict_proba(X[rows])
+            probabilities[i, rows] = prob
+            if member.short_circuit is not None and i < len(members) - 1:
+                confident = np.maximum(prob, 1 - prob) >= member.short_circuit
+                pending[rows[confident]] = False
+                decided_by[rows[confident]] = i
+
+        evaluated = ~np.isnan(probabilities)
+        weights = np.array([member.weight for member in members])[:, None] * evaluated
+        weight_total = weights.sum(axis=0)
+        avg_prob = (np.nan_to_num(probabilities) * weights).sum(axis=0) / weight_total
+        votes = (np.nan_to_num(probabilities) > 0.5) * weights
+
+        if self.voting == 'hard':
+            final_prob = avg_prob
+            final_pred = (votes.sum(axis=0) / weight_total > 0.5).astype(int)
+        elif self.voting == 'stacked' and only is None:
+            final_prob = avg_prob.copy()
+            full = decided_by < 0
+            if full.any():
+                final_prob[full] = self.meta_model.predict_proba(probabilities[:, full].T)[:, 1]
+            final_pred = (final_prob > 0.5).astype(int)
+        else:
+            final_prob = avg_prob
+            final_pred = (final_prob > 0.5).astype(int)
+
+        results = []
+        position = {member.name: i for i, member in enumerate(members)}
+        for row in range(n_rows):
+            member_votes = {}
+            for member in self.members:
+                i = position.get(member.name)
+                if i is not None and evaluated[i, row]:
+                    member_votes[member.name] = {
+                        'prediction': int(probabilities[i, row] > 0.5),
+                        'probability': float(probabilities[i, row])
+                    }
+                else:
+                    member_votes[member.name] = None
+            results.append({
+                'prediction': int(final_pred[row]),
+                'probability': float(final_prob[row]),
+                'votes': member_votes,
+                'short_circuited': bool(decided_by[row] >= 0)
+            })
+        return results
+
+class ModelBundle:
+    """
+    a versioned preprocessor plus ensemble loaded from one directory
+    """
+    def __init__(self, version, preprocessor, ensemble, path=None):
+        self.version = version
+        self.preprocessor = preprocessor
+        self.ensemble = ensemble
+        self.path = path
+
+    def __repr__(self):
+        return f"<ModelBundle {self.version} {self.ensemble.member_names()}>"
+
+    def member(self, name):
+        for member in self.ensemble.members:
+            if member.name == name:
+                return member.model
+        return None
+
+    def predict(self, input_df, only=None):
+        """
+        transform raw application rows and score them with the ensemble
+        """
+        with stage('transform'):
+            X = self.preprocessor.transform(input_df)
+        return self.ensemble.predict(X, only=only)
+
+def _load_pickle(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+def read_manifest(bundle_dir):
+    """
+    the bundle manifest, falling back to the two default models
+    """
+    path = os.path.join(bundle_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return DEFAULT_MANIFEST
+    with open(path) as f:
+        manifest = json.load(f)
+    return {**DEFAULT_MANIFEST, **manifest}
+
+def load_bundle(model_dir, version=None):
+    """
+    load a model bundle; the default version is the top level model directory
+    """
+    version = version or DEFAULT_VERSION
+    bundle_dir = model_dir if version == DEFAULT_VERSION else os.path.join(model_dir, version)
+    manifest = read_manifest(bundle_dir)
+
+    preprocessor = _load_pickle(os.path.join(bundle_dir, manifest['preprocessor']))
+    members = [
+        EnsembleMember(
+            spec['name'],
+            _load_pickle(os.path.join(bundle_dir, spec['file'])),
+            weight=spec.get('weight', 1.0),
+            short_circuit=spec.get('short_circuit')
+        )
+        for spec in manifest['members']
+    ]
+    meta_model = None
+    if manifest.get('meta_model'):
+        meta_model = _load_pickle(os.path.join(bundle_dir, manifest['meta_model']))
+
+    ensemble = Ensemble(members, voting=manifest['voting'], meta_model=meta_model)
+    return ModelBundle(manifest.get('version', version), preprocessor, ensemble, bundle_dir)
+
+def save_manifest(bundle_dir, manifest):
+    """
+    write a bundle manifest next to the pickled models
+    """
+    os.makedirs(bundle_dir, exist_ok=True)
+    with open(os.path.join(bundle_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+def train_stacker(members, X_train, y_train, cv=5):
+    """
+    fit a logistic regression over out-of-fold member probabilities
+    """
+    from sklearn.base import clone
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import cross_val_predict
+
+    features = np.column_stack([
+        cross_val_predict(clone(member.model), X_train, y_train, cv=cv, method='predict_proba')[:, 1]
+        for member in members
+    ])
+    return LogisticRegression().fit(features, y_train)
+
+def read_routes(model_dir):
+    """
+    the version -> traffic share map in a model directory, or None
+    """
+    path = os.path.join(model_dir, ROUTING_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+class BundleRouter:
+    """
+    A/B routing of requests across model bundle versions by percentage
+
+    routes maps a version ('default' for the top level bundle) to its share of
+    traffic; shares are normalised, so {'v1': 90, 'v2': 10} sends one request
+    in ten to v2. A routing key makes the choice sticky per client. loader
+    is called as loader(model_dir, version) to build a bundle.
+    """
+    def __init__(self, model_dir, routes=None, loader=load_bundle):
+        self.model_dir = model_dir
+        self.loader = loader
+        if routes is None:
+            routes = read_routes(model_dir)
+        self.routes = routes or {DEFAULT_VERSION: 100}
+        self._bundles = {}
+        self._load_lock = threading.Lock()
+        self._buckets = self._build_buckets(self.routes)
+
+    @staticmethod
+    def _build_buckets(routes):
+        total = float(sum(routes.values()))
+        if total <= 0:
+            raise ValueError("Routing percentages must add up to more than zero")
+        buckets = []
+        upper = 0.0
+        for version, share in routes.items():
+            upper += share / total
+            buckets.append((upper, version))
+        return buckets
+
+    def choose(self, key=None):
+        """
+        the bundle version a request with this routing key should use
+        """
+        if key is None:
+            point = random.random()
+        else:
+            point = (zlib.crc32(str(key).encode()) % 10000) / 10000.0
+        for upper, version in self._buckets:
+            if point < upper:
+                return version
+        return self._buckets[-1][1]
+
+    def get(self, version=None):
+        """
+        the loaded bundle for a version, loading it on first use
+        """
+        version = version or DEFAULT_VERSION
+        bundle = self._bundles.get(version)
+        if bundle is None:
+            with self._load_lock:
+                bundle = self._bundles.get(version)
+                if bundle is None:
+                    with stage('model_load'):
+                        bundle = self.loader(self.model_dir, version)
+                    self._bundles[version] = bundle
+        return bundle
+
+    def route(self, key=None):
+        return self.get(self.choose(key))
@@ -1,11 +1,13 @@
 import numpy as np
 import pandas as pd
 import pickle
+import time
 import matplotlib.pyplot as plt
 import seaborn as sns
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix, classification_report
 from sklearn.tree import plot_tree
 from preprocess import load_data, preprocess_data
+from compact import STORAGE_TYPES, compact_knn
 
 def load_model(filename):
     """
@@ -115,6 +117,49 @@ def feature_importance(dt_model):
     
     return feature_importance_df
 
+def _time_predict(model, X, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        model.predict_proba(X)
+    return (time.perf_counter() - start) / repeat
+
+def evaluate_compaction(knn_model, X_test, y_test):
+    """
+    accuracy parity, memory saved and speedup of the compact KNN layouts
+    """
+    X_test = np.asarray(X_test)
+    baseline_pred = knn_model.predict(X_test)
+    baseline_accuracy = accuracy_score(y_test, baseline_pred)
+    baseline_bytes = knn_model._fit_X.nbytes + knn_model._y.nbytes
+    baseline_time = _time_predict(knn_model, X_test)
+
+    rows = [{
+        'Storage': 'float64 (sklearn)',
+        'Accuracy': baseline_accuracy,
+        'Agreement': 1.0,
+        'Bytes': baseline_bytes,
+        'Pickled Bytes': len(pickle.dumps(knn_model)),
+        'Memory Saved': 0.0,
+        'Speedup': 1.0
+    }]
+    for storage in STORAGE_TYPES:
+        compact = compact_knn(knn_model, storage=storage)
+        compact_pred = compact.predict(X_test)
+        rows.append({
+            'Storage': storage,
+            'Accuracy': accuracy_score(y_test, compact_pred),
+            'Agreement': float(np.mean(compact_pred == baseline_pred)),
+            'Bytes': compact.nbytes,
+            'Pickled Bytes': len(pickle.dumps(compact)),
+            'Memory Saved': 1 - compact.nbytes / baseline_bytes,
+            'Speedup': baseline_time / _time_predict(compact, X_test)
+        })
+
+    compaction_df = pd.DataFrame(rows)
+    print("\n--- Compact KNN Storage ---")
+    print(compaction_df.to_string(index=False))
+    return compaction_df
+
 if __name__ == "__main__":
     data = load_data('data/loan_data.csv')
     X_train, X_test, y_train, y_test, _ = preprocess_data(data)
@@ -127,6 +172,8 @@ if __name__ == "__main__":
 
     best_model = compare_models(knn_metrics, dt_metrics)
 
+    evaluate_compaction(knn_model, X_test, y_test)
+
     if best_model == 'Decision Tree' or best_model == 'Both':
         plot_decision_tree(dt_model)
         feature_importance(dt_model)
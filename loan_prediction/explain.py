@@ -0,0 +1,115 @@
+import numpy as np
+
+def feature_names(preprocessor):
+    """
+    readable names for the transformed feature columns
+    """
+    names = []
+    for name in preprocessor.get_feature_names_out():
+        name = name.split('__', 1)[-1]
+        if name.startswith('employment_status_'):
+            name = name[len('employment_status_'):]
+        names.append(name)
+    return names
+
+class TreeExplainer:
+    """
+    decision path contributions read from the flattened tree arrays
+
+    every split along the path moves the approval probability from the
+    parent's value to the child's; that change is credited to the split
+    feature. Contributions only depend on the leaf, so they are built once
+    for every node and each explanation is a table lookup after apply().
+    """
+    def __init__(self, model, n_features):
+        self.model = model
+        self.n_features = n_features
+        self._contributions = None
+        self._node_probability = None
+
+    def _build(self):
+        tree = self.model.tree_
+        n_nodes = tree.children_left.shape[0]
+        value = np.asarray(tree.value, dtype=np.float64).reshape(n_nodes, -1)
+        positive = list(self.model.classes_).index(1) if 1 in self.model.classes_ else value.shape[1] - 1
+        probability = value[:, positive] / value.sum(axis=1)
+
+        parent = np.full(n_nodes, -1)
+        internal = np.flatnonzero(np.asarray(tree.children_left) != -1)
+        parent[np.asarray(tree.children_left)[internal]] = internal
+        parent[np.asarray(tree.children_right)[internal]] = internal
+
+        contributions = np.zeros((n_nodes, self.n_features))
+        for node in range(1, n_nodes):
+            up = parent[node]
+            contributions[node] = contributions[up]
+            contributions[node, tree.feature[up]] += probability[node] - probability[up]
+
+        self._node_probability = probability
+        self._contributions = contributions
+
+    def explain(self, X):
+        """
+        bias, per feature contributions and leaf for every row of X
+        """
+        if self._contributions is None:
+            self._build()
+        leaves = self.model.apply(X)
+        return (self._node_probability[0], self._contributions[leaves],
+                self._node_probability[leaves], leaves)
+
+class NeighborExplainer:
+    """
+    the training rows a KNN prediction was voted on by
+    """
+    def __init__(self, model):
+        self.model = model
+
+    def explain(self, X):
+        distances, indices = self.model.kneighbors(X)
+        labels = np.asarray(self.model.classes_)[np.asarray(self.model._y)[indices]]
+        return distances, indices, labels
+
+class BundleExplainer:
+    """
+    model faithful explanations for every member of a model bundle
+    """
+    def __init__(self, bundle):
+        self.bundle = bundle
+        self.features = feature_names(bundle.preprocessor)
+        self.explainers = {}
+        for member in bundle.ensemble.members:
+            if hasattr(member.model, 'tree_'):
+                self.explainers[member.name] = TreeExplainer(member.model, len(self.features))
+            elif hasattr(member.model, 'kneighbors'):
+                self.explainers[member.name] = NeighborExplainer(member.model)
+
+    def explain(self, input_df):
+        """
+        ensemble decision plus per member attributions for each input row
+        """
+        X = self.bundle.preprocessor.transform(input_df)
+        results = self.bundle.ensemble.predict(X)
+
+        for name, explainer in self.explainers.items():
+            if isinstance(explainer, TreeExplainer):
+                bias, contributions, leaf_probability, leaves = explainer.explain(X)
+                for row, result in enumerate(results):
+                    result.setdefault('explanations', {})[name] = {
+                        'type': 'decision_path',
+                        'bias': float(bias),
+                        'contributions': dict(zip(self.features, contributions[row].round(4).tolist())),
+                        'probability': float(leaf_probability[row]),
+                        'leaf': int(leaves[row])
+                    }
+            else:
+                distances, indices, labels = explainer.explain(X)
+                for row, result in enumerate(results):
+                    result.setdefault('explanations', {})[name] = {
+                        'type': 'nearest_neighbors',
+                        'neighbors': [
+                            {'index': int(index), 'distance': round(float(distance), 4), 'label': int(neighbor_label)}
+                            for index, distance, neighbor_label in zip(indices[row], distances[row], labels[row])
+                        ]
+                    }
+        return results
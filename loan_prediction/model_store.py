@@ -0,0 +1,286 @@
+import argparse
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import numpy as np
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.tree import DecisionTreeClassifier
+from ensemble import DEFAULT_VERSION, ROUTING_FILE, Ensemble, EnsembleMember, ModelBundle, load_bundle, read_routes
+
+STORE_MANIFEST = 'store.json'
+
+def _dense(X):
+    if hasattr(X, 'toarray'):
+        X = X.toarray()
+    return np.asarray(X, dtype=np.float64)
+
+class TreeArrays:
+    """
+    flattened decision tree, laid out like sklearn's tree_ attribute
+    """
+    def __init__(self, children_left, children_right, feature, threshold, value):
+        self.children_left = children_left
+        self.children_right = children_right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+
+    @property
+    def node_count(self):
+        return self.children_left.shape[0]
+
+class SharedTree:
+    """
+    decision tree inference over read-only, memory-mapped node arrays
+    """
+    def __init__(self, tree_, classes):
+        self.tree_ = tree_
+        self.classes_ = classes
+
+    def apply(self, X):
+        """
+        index of the leaf each row of X lands in
+        """
+        tree = self.tree_
+        X = _dense(X).astype(np.float32)
+        node = np.zeros(X.shape[0], dtype=np.intp)
+        active = tree.children_left[node] != -1
+        while active.any():
+            rows = np.flatnonzero(active)
+            current = node[rows]
+            go_left = X[rows, tree.feature[current]] <= tree.threshold[current]
+            node[rows] = np.where(go_left, tree.children_left[current], tree.children_right[current])
+            active[rows] = tree.children_left[node[rows]] != -1
+        return node
+
+    def predict_proba(self, X):
+        return np.asarray(self.tree_.value[self.apply(X)])
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+class SharedKNN:
+    """
+    brute force KNN over a read-only, memory-mapped training matrix
+    """
+    chunk_size = 256
+
+    def __init__(self, fit_X, sq_norms, y, classes, n_neighbors, weights, metric, p):
+        self.fit_X = fit_X
+        self.sq_norms = sq_norms
+        self._y = y
+        self.classes_ = classes
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+        self.metric = metric
+        self.p = p
+
+    def _distances(self, X):
+        if self.metric == 'euclidean':
+            sq = (X * X).sum(axis=1)[:, None] - 2 * X.dot(self.fit_X.T) + self.sq_norms[None, :]
+            return np.sqrt(np.maximum(sq, 0))
+        diff = np.abs(X[:, None, :] - self.fit_X[None, :, :])
+        if self.metric == 'manhattan':
+            return diff.sum(axis=2)
+        return (diff ** self.p).sum(axis=2) ** (1.0 / self.p)
+
+    def kneighbors(self, X, n_neighbors=None, return_distance=True):
+        """
+        distances to and indices of the nearest training rows
+
+        queries are processed chunk_size rows at a time so the distance
+        matrix of a large batch is never built in one piece
+        """
+        k = n_neighbors or self.n_neighbors
+        X = _dense(X)
+        all_dist = []
+        all_index = []
+        for start in range(0, X.shape[0], self.chunk_size):
+            distances = self._distances(X[start:start + self.chunk_size])
+            nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            nearest_dist = np.take_along_axis(distances, nearest, axis=1)
+            order = np.argsort(nearest_dist, axis=1, kind='stable')
+            all_index.append(np.take_along_axis(nearest, order, axis=1))
+            all_dist.append(np.take_along_axis(nearest_dist, order, axis=1))
+        distances = np.vstack(all_dist)
+        nearest = np.vstack(all_index)
+        if return_distance:
+            return distances, nearest
+        return nearest
+
+    def predict_proba(self, X):
+        distances, nearest = self.kneighbors(X)
+        if self.weights == 'distance':
+            with np.errstate(divide='ignore'):
+                weights = 1.0 / distances
+            exact = np.isinf(weights)
+            exact_rows = exact.any(axis=1)
+            weights[exact_rows] = exact[exact_rows]
+        else:
+            weights = np.ones_like(distances)
+        labels = np.asarray(self._y)[nearest]
+        proba = np.zeros((labels.shape[0], len(self.classes_)))
+        for class_index in range(len(self.classes_)):
+            proba[:, class_index] = (weights * (labels == class_index)).sum(axis=1)
+        return proba / proba.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+def _save_arrays(store_dir, prefix, arrays):
+    files = {}
+    for key, array in arrays.items():
+        filename = f'{prefix}_{key}.npy'
+        np.save(os.path.join(store_dir, filename), np.ascontiguousarray(array))
+        files[key] = filename
+    return files
+
+def _export_member(store_dir, member):
+    model = member.model
+    spec = {'name': member.name, 'weight': member.weight, 'short_circuit': member.short_circuit}
+
+    if isinstance(model, DecisionTreeClassifier):
+        tree = model.tree_
+        value = tree.value[:, 0, :]
+        value = value / value.sum(axis=1, keepdims=True)
+        spec['kind'] = 'tree'
+        spec['arrays'] = _save_arrays(store_dir, member.name, {
+            'children_left': tree.children_left,
+            'children_right': tree.children_right,
+            'feature': tree.feature,
+            'threshold': tree.threshold,
+            'value': value,
+            'classes': model.classes_
+        })
+    elif isinstance(model, KNeighborsClassifier) and model.weights in ('uniform', 'distance'):
+        fit_X = _dense(model._fit_X)
+        metric = model.effective_metric_
+        p = model.effective_metric_params_.get('p', model.p)
+        if metric == 'minkowski' and p == 2:
+            metric = 'euclidean'
+        if metric == 'minkowski' and p == 1:
+            metric = 'manhattan'
+        spec['kind'] = 'knn'
+        spec['params'] = {
+            'n_neighbors': model.n_neighbors,
+            'weights': model.weights,
+            'metric': metric,
+            'p': p
+        }
+        spec['arrays'] = _save_arrays(store_dir, member.name, {
+            'fit_X': fit_X,
+            'sq_norms': (fit_X * fit_X).sum(axis=1),
+            'y': model._y,
+            'classes': model.classes_
+        })
+    else:
+        spec['kind'] = 'pickle'
+        spec['file'] = f'{member.name}.pkl'
+        with open(os.path.join(store_dir, spec['file']), 'wb') as f:
+            pickle.dump(model, f)
+    return spec
+
+def export_store(bundle, store_dir):
+    """
+    write a bundle's numeric arrays as .npy files workers can memory-map
+
+    the store is built in a temporary directory next to store_dir and renamed
+    into place, so workers never attach to a half written store
+    """
+    parent = os.path.dirname(os.path.abspath(store_dir))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.loan-store-', dir=parent)
+
+    manifest = {
+        'version': bundle.version,
+        'voting': bundle.ensemble.voting,
+        'members': [_export_member(staging, member) for member in bundle.ensemble.members]
+    }
+    with open(os.path.join(staging, 'preprocessor.pkl'), 'wb') as f:
+        pickle.dump(bundle.preprocessor, f)
+    if bundle.ensemble.meta_model is not None:
+        with open(os.path.join(staging, 'meta_model.pkl'), 'wb') as f:
+            pickle.dump(bundle.ensemble.meta_model, f)
+        manifest['meta_model'] = 'meta_model.pkl'
+    with open(os.path.join(staging, STORE_MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    if os.path.exists(store_dir):
+        shutil.rmtree(store_dir)
+    os.rename(staging, store_dir)
+    return store_dir
+
+def _attach_arrays(store_dir, files):
+    return {key: np.load(os.path.join(store_dir, filename), mmap_mode='r')
+            for key, filename in files.items()}
+
+def _attach_member(store_dir, spec):
+    if spec['kind'] == 'tree':
+        arrays = _attach_arrays(store_dir, spec['arrays'])
+        classes = np.asarray(arrays.pop('classes'))
+        model = SharedTree(TreeArrays(**arrays), classes)
+    elif spec['kind'] == 'knn':
+        arrays = _attach_arrays(store_dir, spec['arrays'])
+        model = SharedKNN(arrays['fit_X'], arrays['sq_norms'], arrays['y'],
+                          np.asarray(arrays['classes']), **spec['params'])
+    else:
+        with open(os.path.join(store_dir, spec['file']), 'rb') as f:
+            model = pickle.load(f)
+    return EnsembleMember(spec['name'], model, weight=spec['weight'], short_circuit=spec['short_circuit'])
+
+def attach_store(store_root, version=None):
+    """
+    a model bundle backed by zero-copy, read-only views of an exported store
+    """
+    store_dir = os.path.join(store_root, version or DEFAULT_VERSION)
+    with open(os.path.join(store_dir, STORE_MANIFEST)) as f:
+        manifest = json.load(f)
+    with open(os.path.join(store_dir, 'preprocessor.pkl'), 'rb') as f:
+        preprocessor = pickle.load(f)
+
+    members = [_attach_member(store_dir, spec) for spec in manifest['members']]
+    meta_model = None
+    if manifest.get('meta_model'):
+        with open(os.path.join(store_dir, manifest['meta_model']), 'rb') as f:
+            meta_model = pickle.load(f)
+
+    ensemble = Ensemble(members, voting=manifest['voting'], meta_model=meta_model)
+    return ModelBundle(manifest['version'], preprocessor, ensemble, store_dir)
+
+def prepare_store(model_dir, store_root, versions=None):
+    """
+    load every bundle once in the parent process and export it to the store
+
+    the model directory's routing file is copied into the store root so the
+    A/B split is kept; without explicit versions every routed version is
+    exported
+    """
+    routes = read_routes(model_dir)
+    versions = versions or (list(routes) if routes else [DEFAULT_VERSION])
+    if routes:
+        missing = sorted(set(routes) - set(versions))
+        if missing:
+            raise ValueError(f"Routed versions not exported: {', '.join(missing)}")
+    for version in versions:
+        bundle = load_bundle(model_dir, version)
+        export_store(bundle, os.path.join(store_root, version))
+        print(f"Exported {bundle} to {store_root}")
+
+    routing_path = os.path.join(store_root, ROUTING_FILE)
+    if routes:
+        staging = routing_path + '.tmp'
+        with open(staging, 'w') as f:
+            json.dump(routes, f, indent=2)
+        os.replace(staging, routing_path)
+    elif os.path.exists(routing_path):
+        os.remove(routing_path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export model bundles to a shared model store")
+    parser.add_argument('--models', default=os.path.join(os.path.dirname(__file__), 'models'))
+    parser.add_argument('--store', default='/dev/shm/loan-models')
+    parser.add_argument('versions', nargs='*')
+    args = parser.parse_args()
+    prepare_store(args.models, args.store, args.versions)
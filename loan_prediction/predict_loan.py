@@ -2,6 +2,8 @@ import pickle
 import os
 import numpy as np
 import pandas as pd
+from explain import TreeExplainer, NeighborExplainer, feature_names
+from schema import LOAN_APPLICATION, ValidationError
 
 def load_models():
     models_dir = os.path.join(os.path.dirname(__file__), 'models')
@@ -44,13 +46,19 @@ def get_user_input():
             print("Invalid choice. Defaulting to employed.")
             employment_status = "employed"
         
-        return {
+        loan_data = {
             'income': income,
             'credit_score': credit_score,
             'loan_amount': loan_amount,
             'loan_term': loan_term,
             'employment_status': employment_status
         }
+        LOAN_APPLICATION.validate(loan_data)
+        return loan_data
+    except ValidationError as e:
+        for error in e.errors:
+            print(f"Error: {error['error']}")
+        return None
     except ValueError:
         print("Error: Please enter valid numbers for the financial information.")
         return None
@@ -66,11 +74,18 @@ def predict_loan_approval(loan_data, preprocessor, knn_model, dt_model):
     dt_pred = dt_model.predict(X)[0]
     dt_prob = dt_model.predict_proba(X)[0][1]
     
+    names = feature_names(preprocessor)
+    bias, contributions, _, _ = TreeExplainer(dt_model, len(names)).explain(X)
+    _, _, neighbor_labels = NeighborExplainer(knn_model).explain(X)
+    
     return {
         'knn_prediction': knn_pred,
         'knn_probability': knn_prob,
         'dt_prediction': dt_pred,
-        'dt_probability': dt_prob
+        'dt_probability': dt_prob,
+        'dt_bias': bias,
+        'dt_contributions': dict(zip(names, contributions[0])),
+        'knn_neighbor_labels': neighbor_labels[0]
     }
 
 def display_results(loan_data, predictions):
@@ -100,34 +115,19 @@ def display_results(loan_data, predictions):
 def explain_result(loan_data, predictions):
     print("\n===== Analysis =====")
     
-    if loan_data['income'] >= 60000:
-        print("POSITIVE: Your income is favorable for loan approval")
-    elif loan_data['income'] >= 40000:
-        print("NEUTRAL: Your income is acceptable for loan consideration")
-    else:
-        print("CONCERN: Your income may be below the preferred threshold")
-    
-    if loan_data['credit_score'] >= 700:
-        print("POSITIVE: Your credit score is excellent")
-    elif loan_data['credit_score'] >= 650:
-        print("NEUTRAL: Your credit score is reasonable")
-    else:
-        print("CONCERN: Your credit score may need improvement")
-    
-    loan_to_income = loan_data['loan_amount'] / loan_data['income']
-    if loan_to_income <= 0.3:
-        print("POSITIVE: Your loan amount to income ratio is healthy")
-    elif loan_to_income <= 0.5:
-        print("NEUTRAL: Your loan amount is reasonable compared to your income")
-    else:
-        print("CONCERN: Your requested loan amount is high relative to your income")
+    print(f"Baseline approval rate in the decision tree: {predictions['dt_bias']*100:.1f}%")
+    contributions = sorted(predictions['dt_contributions'].items(), key=lambda item: -abs(item[1]))
+    for feature, contribution in contributions:
+        if abs(contribution) < 0.005:
+            continue
+        if contribution > 0:
+            print(f"POSITIVE: {feature} raised the approval probability by {contribution*100:.1f} points")
+        else:
+            print(f"CONCERN: {feature} lowered the approval probability by {-contribution*100:.1f} points")
     
-    if loan_data['employment_status'] == 'employed':
-        print("POSITIVE: Being employed is favorable for loan approval")
-    elif loan_data['employment_status'] == 'self-employed':
-        print("NEUTRAL: Being self-employed is considered in loan decisions")
-    else:
-        print("CONCERN: Being unemployed may make loan approval challenging")
+    approved = int(sum(predictions['knn_neighbor_labels'] == 1))
+    total = len(predictions['knn_neighbor_labels'])
+    print(f"\n{approved} of the {total} most similar past applications were approved.")
     
     print("\nRemember: This is just a prediction model and not a final decision from a bank.")
     print("Actual loan approvals may consider additional factors not included in this model.")
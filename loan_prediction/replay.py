@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+import sqlite3
+import time
+import numpy as np
+import pandas as pd
+from ensemble import BundleRouter
+
+AUDIT_TABLE = 'prediction_audit'
+
+def load_audit_records(audit_db, endpoint=None, since=None, limit=None):
+    """
+    logged predictions in arrival order, one record per application
+    """
+    query = f'SELECT id, ts, endpoint, model_version, inputs, outputs, request_id, degraded FROM {AUDIT_TABLE}'
+    clauses = []
+    params = []
+    if endpoint:
+        clauses.append('endpoint = ?')
+        params.append(endpoint)
+    if since:
+        clauses.append('ts >= ?')
+        params.append(since)
+    if clauses:
+        query += ' WHERE ' + ' AND '.join(clauses)
+    query += ' ORDER BY ts, id'
+    if limit:
+        query += f' LIMIT {int(limit)}'
+
+    conn = sqlite3.connect(audit_db)
+    try:
+        rows = conn.execute(query, params).fetchall()
+    finally:
+        conn.close()
+    return [
+        {'ts': ts, 'endpoint': endpoint, 'model_version': version,
+         'inputs': json.loads(inputs), 'outputs': json.loads(outputs),
+         'request_id': request_id or f'row-{row_id}', 'degraded': bool(degraded)}
+        for row_id, ts, endpoint, version, inputs, outputs, request_id, degraded in rows
+    ]
+
+def group_requests(records):
+    """
+    regroup per application records into the requests that logged them
+
+    rows written before request ids were recorded each count as their own
+    request
+    """
+    requests = {}
+    for record in records:
+        request = requests.get(record['request_id'])
+        if request is None:
+            request = requests[record['request_id']] = {
+                'ts': record['ts'], 'endpoint': record['endpoint'],
+                'model_version': record['model_version'], 'degraded': record['degraded'],
+                'inputs': [], 'outputs': []
+            }
+        request['inputs'].append(record['inputs'])
+        request['outputs'].append(record['outputs'])
+    return list(requests.values())
+
+def replay(requests, router, speed=1.0, rate=None, version=None):
+    """
+    feed logged requests back through the scoring engine, one batch each
+
+    speed scales the logged inter-arrival gaps (2.0 replays twice as fast,
+    0 as fast as possible); rate instead fixes requests per second. version
+    overrides the logged model version, e.g. to compare a candidate bundle.
+    Requests served in degraded mode are replayed for timing but left out
+    of decisions_changed, since they were not scored by the full ensemble.
+    """
+    latencies = []
+    changed = 0
+    applications = 0
+    degraded = 0
+    replay_start = time.perf_counter()
+    first_ts = requests[0]['ts'] if requests else 0
+
+    for index, record in enumerate(requests):
+        if rate:
+            due = index / rate
+        elif speed:
+            due = (record['ts'] - first_ts) / speed
+        else:
+            due = 0
+        wait = due - (time.perf_counter() - replay_start)
+        if wait > 0:
+            time.sleep(wait)
+
+        bundle = router.get(version or record['model_version'])
+        started = time.perf_counter()
+        results = bundle.predict(pd.DataFrame(record['inputs']))
+        latencies.append((time.perf_counter() - started) * 1000)
+        applications += len(results)
+        if record['degraded']:
+            degraded += len(results)
+            continue
+        changed += sum(
+            result['prediction'] != output['prediction']
+            for result, output in zip(results, record['outputs'])
+        )
+
+    return {
+        'requests': len(requests),
+        'applications': applications,
+        'degraded_skipped': degraded,
+        'elapsed_s': time.perf_counter() - replay_start,
+        'latency_ms_p50': float(np.percentile(latencies, 50)) if latencies else 0.0,
+        'latency_ms_p99': float(np.percentile(latencies, 99)) if latencies else 0.0,
+        'decisions_changed': changed
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay logged loan predictions")
+    parser.add_argument('--audit-db', default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'audit.db'))
+    parser.add_argument('--models', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models'))
+    parser.add_argument('--endpoint')
+    parser.add_argument('--limit', type=int)
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="multiple of the recorded pace, 0 for as fast as possible")
+    parser.add_argument('--rate', type=float, help="fixed requests per second instead of the recorded pace")
+    parser.add_argument('--version', help="score with this bundle instead of the logged one")
+    args = parser.parse_args()
+
+    requests = group_requests(load_audit_records(args.audit_db, args.endpoint, limit=args.limit))
+    print(f"Replaying {len(requests)} logged requests...")
+    summary = replay(requests, BundleRouter(args.models), speed=args.speed, rate=args.rate, version=args.version)
+    for key, value in summary.items():
+        print(f"{key}: {value:.3f}" if isinstance(value, float) else f"{key}: {value}")
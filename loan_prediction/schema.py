@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+LOAN_APPLICATION_SCHEMA = {
+    'income': {'type': 'number', 'min': 0, 'max': 100_000_000},
+    'credit_score': {'type': 'number', 'min': 300, 'max': 850},
+    'loan_amount': {'type': 'number', 'min': 1, 'max': 100_000_000},
+    'loan_term': {'type': 'number', 'min': 1, 'max': 360},
+    'employment_status': {
+        'type': 'category',
+        'choices': ['employed', 'self-employed', 'unemployed']
+    }
+}
+
+class ValidationError(ValueError):
+    """
+    raised with every problem found in one or more loan applications
+    """
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(errors[0]['error'] if errors else 'Invalid input')
+
+def _error(index, field, message):
+    return {'index': index, 'field': field, 'error': message}
+
+class CompiledSchema:
+    """
+    a schema turned into per column checks that run on whole batches
+
+    numeric columns are coerced with a single numpy conversion and range
+    checked with array comparisons; categories are normalised and looked up
+    in a set built once.
+    """
+    def __init__(self, schema):
+        self.schema = schema
+        self.fields = list(schema)
+        self.numeric = [name for name, spec in schema.items() if spec['type'] == 'number']
+        self.categorical = [name for name, spec in schema.items() if spec['type'] == 'category']
+        self.bounds = {name: (schema[name].get('min', -np.inf), schema[name].get('max', np.inf))
+                       for name in self.numeric}
+        self.choices = {name: frozenset(schema[name]['choices']) for name in self.categorical}
+        self.choice_text = {name: ', '.join(schema[name]['choices']) for name in self.categorical}
+
+    def _coerce_numeric(self, name, values, errors):
+        try:
+            column = np.asarray(values, dtype=np.float64)
+            if column.ndim != 1:
+                raise ValueError('non-scalar value')
+        except (TypeError, ValueError, OverflowError):
+            column = np.empty(len(values))
+            for index, value in enumerate(values):
+                try:
+                    column[index] = float(value)
+                except (TypeError, ValueError, OverflowError):
+                    column[index] = np.nan
+        for index, value in enumerate(values):
+            if isinstance(value, (bool, np.bool_)):
+                column[index] = np.nan
+        low, high = self.bounds[name]
+        bad = np.flatnonzero(~np.isfinite(column))
+        for index in bad:
+            errors.append(_error(int(index), name, f'{name} must be a number'))
+        out_of_range = np.flatnonzero(np.isfinite(column) & ((column < low) | (column > high)))
+        for index in out_of_range:
+            errors.append(_error(int(index), name, f'{name} must be between {low:g} and {high:g}'))
+        return column
+
+    def _coerce_category(self, name, values, errors):
+        column = [str(value).strip().lower() if value is not None else '' for value in values]
+        allowed = self.choices[name]
+        for index, value in enumerate(column):
+            if value not in allowed:
+                errors.append(_error(index, name, f'{name} must be one of: {self.choice_text[name]}'))
+        return column
+
+    def validate_batch(self, records):
+        """
+        a DataFrame of clean applications, or ValidationError listing every problem
+        """
+        if isinstance(records, dict):
+            records = [records]
+        if not isinstance(records, list) or not records:
+            raise ValidationError([_error(None, None, 'No data provided')])
+
+        errors = []
+        for index, record in enumerate(records):
+            if not isinstance(record, dict):
+                errors.append(_error(index, None, 'Each application must be an object'))
+                continue
+            for name in self.fields:
+                if name not in record or record[name] in (None, ''):
+                    errors.append(_error(index, name, f'Missing required field: {name}'))
+        if errors:
+            raise ValidationError(errors)
+
+        columns = {}
+        for name in self.fields:
+            values = [record[name] for record in records]
+            if name in self.bounds:
+                columns[name] = self._coerce_numeric(name, values, errors)
+            else:
+                columns[name] = self._coerce_category(name, values, errors)
+        if errors:
+            errors.sort(key=lambda error: error['index'])
+            raise ValidationError(errors)
+        return pd.DataFrame(columns, columns=self.fields)
+
+    def validate(self, record):
+        """
+        a one row DataFrame for a single clean application
+        """
+        return self.validate_batch([record])
+
+def compile_schema(schema):
+    return CompiledSchema(schema)
+
+LOAN_APPLICATION = compile_schema(LOAN_APPLICATION_SCHEMA)
@@ -2,10 +2,13 @@ import numpy as np
 import pandas as pd
 import pickle
 import os
+import argparse
 from sklearn.neighbors import KNeighborsClassifier
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.model_selection import GridSearchCV
 from preprocess import load_data, preprocess_data
+from compact import STORAGE_TYPES, compact_knn
+from ensemble import DEFAULT_MANIFEST, VOTING_MODES, EnsembleMember, save_manifest, train_stacker
 
 def train_knn(X_train, y_train):
     """
@@ -54,22 +57,55 @@ def train_decision_tree(X_train, y_train):
 
     return best_dt
 
-def save_model(model, filename):
+def save_model(model, filename, model_dir='models'):
     """
     save the trained model to a file
     """
-    os.makedirs('models', exist_ok=True)
+    os.makedirs(model_dir, exist_ok=True)
 
-    with open(f'models/{filename}', 'wb') as f:
+    with open(os.path.join(model_dir, filename), 'wb') as f:
         pickle.dump(model, f)
 
-    print(f"Model saved as models/{filename}")
+    print(f"Model saved as {model_dir}/{filename}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the loan approval models")
+    parser.add_argument('--version', help="save a versioned bundle under models/<version>")
+    parser.add_argument('--voting', choices=VOTING_MODES, default='soft')
+    parser.add_argument('--short-circuit', type=float, default=None,
+                        help="skip KNN when the decision tree is at least this confident")
+    parser.add_argument('--knn-storage', choices=('float64',) + STORAGE_TYPES, default='float64',
+                        help="serve KNN from a compact float32 or int16 copy of the training data")
+    return parser.parse_args()
 
 if __name__ == "__main__":
+    args = parse_args()
+    model_dir = os.path.join('models', args.version) if args.version else 'models'
+
     data = load_data('data/loan_data.csv')
     X_train, X_test, y_train, y_test, preprocessor = preprocess_data(data)
-    save_model(preprocessor, 'preprocessor.pkl')
+    save_model(preprocessor, 'preprocessor.pkl', model_dir)
     knn_model = train_knn(X_train, y_train)
-    save_model(knn_model, 'knn_model.pkl')
+    save_model(knn_model, 'knn_model.pkl', model_dir)
+    knn_file = 'knn_model.pkl'
+    if args.knn_storage != 'float64':
+        knn_file = f'knn_{args.knn_storage}.pkl'
+        save_model(compact_knn(knn_model, storage=args.knn_storage), knn_file, model_dir)
     dt_model = train_decision_tree(X_train, y_train)
-    save_model(dt_model, 'decision_tree_model.pkl')
+    save_model(dt_model, 'decision_tree_model.pkl', model_dir)
+
+    manifest = {
+        **DEFAULT_MANIFEST,
+        'version': args.version or 'default',
+        'voting': args.voting,
+        'members': [
+            {'name': 'dt', 'file': 'decision_tree_model.pkl', 'weight': 1.0,
+             'short_circuit': args.short_circuit},
+            {'name': 'knn', 'file': knn_file, 'weight': 1.0}
+        ]
+    }
+    if args.voting == 'stacked':
+        members = [EnsembleMember('dt', dt_model), EnsembleMember('knn', knn_model)]
+        save_model(train_stacker(members, X_train, y_train), 'stacker.pkl', model_dir)
+        manifest['meta_model'] = 'stacker.pkl'
+    save_manifest(model_dir, manifest)